@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 
-from .routers import cities, creations
+from .routers import cities, creations, service
 
 router = APIRouter()
 router.include_router(cities.router, tags=['Города'])
 router.include_router(creations.router, tags=['Произведения'])
+router.include_router(service.router, tags=['Служебное'])
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.dependencies.common import get_afisha_client
 from app.schemas.cities import CitiesRequest
 from app.schemas.cities import CitiesFilter
-from app.services.afisha import AfishaClient
+from app.services.afisha import AfishaClient, AfishaUnavailableError
 from app.utils.logger import get_logger
 from app.utils.helpers import transform_params
 
@@ -17,14 +17,32 @@ async def get_cities(
     afisha: AfishaClient = Depends(get_afisha_client),
 ):
     try:
-        request_params = transform_params(params=params.model_dump())
+        request_params = transform_params(params=params)
         response = await afisha.cities.get_list(request_params)
         return response
+    except AfishaUnavailableError:
+        raise
     except Exception:
         logger.error('Ошибка при получении списка городов', exc_info=True)
         raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
 
 
+@router.get('/cities/search')
+async def search_cities(
+    q: str = Query(..., min_length=1, description='Начало или часть названия города'),
+    limit: int = Query(10, ge=1, le=50, description='Максимальное количество городов'),
+    afisha: AfishaClient = Depends(get_afisha_client),
+):
+    try:
+        city_index = await afisha.city_directory.get_index()
+        return {'Cities': city_index.search(q, limit=limit)}
+    except AfishaUnavailableError:
+        raise
+    except Exception:
+        logger.error(f'Ошибка при поиске города по запросу {q!r}', exc_info=True)
+        raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
+
+
 @router.get('/city/{city_id}')
 async def get_city(
     city_id: int,
@@ -33,6 +51,8 @@ async def get_city(
     try:
         response = await afisha.cities.get_by_id(city_id)
         return response
+    except AfishaUnavailableError:
+        raise
     except Exception:
         logger.error(f'Ошибка при получении города с ID {city_id}', exc_info=True)
         raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
@@ -1,67 +1,161 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
 
-from app.dependencies.common import get_afisha_client
-from app.schemas.creations import CreationFilter, CreationScheduleFilter
-from app.services.afisha import AfishaClient
-from app.utils.helpers import clean_creations, transform_params
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from app.dependencies.common import get_afisha_client, get_catalog
+from app.schemas.creations import (
+    CreationBatchRequest,
+    CreationBatchResponse,
+    CreationDetail,
+    CreationFilter,
+    CreationSchedule,
+    CreationScheduleFilter,
+    CreationsPage,
+    CreationStreamFilter,
+    creation_batch_adapter,
+)
+from app.services.afisha import AfishaClient, AfishaUnavailableError
+from app.services.catalog import LocalCatalog, is_local_cursor
+from app.utils.helpers import clean_creations_json, creations_ndjson, transform_params
 from app.utils.logger import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
-@router.get('/creations/page')
+@router.get('/creations/page', response_model=CreationsPage)
 async def get_creations(
     params: CreationFilter = Depends(),
     afisha: AfishaClient = Depends(get_afisha_client),
+    catalog: Optional[LocalCatalog] = Depends(get_catalog),
 ):
     try:
-        cities_response = await afisha.cities.get_list()
-        request_params = transform_params(params=params, cities=cities_response)
-        response = clean_creations(await afisha.creations.get_list(request_params))
-        return response
+        city_index = await afisha.city_directory.get_index()
+        request_params = transform_params(params=params, cities=city_index)
+        # Синхронизированные города отдаём из локального снимка
+        if catalog is not None and await catalog.can_serve(request_params):
+            content = await catalog.query_page(request_params)
+            return Response(content=content, media_type='application/json')
+        if is_local_cursor(request_params.get('Cursor')):
+            # Курсор выдан снимком, которого больше нет, а Афиша его не поймёт
+            raise HTTPException(status_code=410, detail='Курсор устарел, запросите первую страницу')
+        raw = await afisha.creations.get_list_raw(request_params)
+        return Response(content=clean_creations_json(raw), media_type='application/json')
+    except (AfishaUnavailableError, HTTPException):
+        raise
     except Exception:
         logger.error('Ошибка при получении списка произведений', exc_info=True)
         raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
 
 
-@router.get('/creation/{id}')
+@router.get(
+    '/creations/stream',
+    response_class=StreamingResponse,
+    responses={200: {'content': {'application/x-ndjson': {}}}},
+)
+async def stream_creations(
+    params: CreationStreamFilter = Depends(),
+    afisha: AfishaClient = Depends(get_afisha_client),
+):
+    """Весь список произведений по городу и периоду одним потоком NDJSON (объект на строку)."""
+    try:
+        city_index = await afisha.city_directory.get_index()
+        request_params = transform_params(params=params, cities=city_index)
+        pages = afisha.creations.iter_pages(request_params)
+        # Первую страницу ждём до начала ответа, чтобы ошибки вернулись обычным статусом
+        first_page = await anext(pages)
+    except AfishaUnavailableError:
+        raise
+    except Exception:
+        logger.error('Ошибка при выгрузке списка произведений', exc_info=True)
+        raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
+
+    return StreamingResponse(
+        creations_ndjson(first_page, pages, logger), media_type='application/x-ndjson'
+    )
+
+
+@router.post('/creations/batch', response_model=CreationBatchResponse)
+async def get_creations_batch(
+    body: CreationBatchRequest,
+    afisha: AfishaClient = Depends(get_afisha_client),
+):
+    """Карточки и расписания нескольких произведений; ошибки возвращаются по каждому элементу."""
+    try:
+        schedule_params = None
+        if body.include_schedule:
+            city_index = await afisha.city_directory.get_index()
+            schedule_params = transform_params(params=body.schedule, cities=city_index)
+        response = await afisha.creations.get_batch(
+            ids=body.ids,
+            kinoplan_ids=body.kinoplan_ids,
+            include_schedule=body.include_schedule,
+            schedule_params=schedule_params,
+        )
+        return Response(
+            content=creation_batch_adapter.dump_json(response, exclude_unset=True),
+            media_type='application/json',
+        )
+    except AfishaUnavailableError:
+        raise
+    except Exception:
+        logger.error('Ошибка при пакетной загрузке произведений', exc_info=True)
+        raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
+
+
+@router.get('/creation/{id}', response_model=CreationDetail)
 async def get_creation(
-    id,
+    id: int,
     afisha: AfishaClient = Depends(get_afisha_client),
 ):
     try:
-        response = await afisha.creations.get_by_id(id)
-        return response
+        raw = await afisha.creations.get_by_id_raw(id)
+        creation = CreationDetail.model_validate_json(raw)
+        return Response(
+            content=creation.model_dump_json(exclude_unset=True), media_type='application/json'
+        )
+    except AfishaUnavailableError:
+        raise
     except Exception:
         logger.error(f'Ошибка при получении произведения с ID {id}', exc_info=True)
         raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
 
 
-@router.get('/creation/kinoplan/{id}')
+@router.get('/creation/kinoplan/{id}', response_model=CreationDetail)
 async def get_creation_kinoplan(
     id,
     afisha: AfishaClient = Depends(get_afisha_client),
 ):
     try:
-        response = await afisha.creations.get_by_kinoplan_id(id)
-        return response
+        raw = await afisha.creations.get_by_kinoplan_id_raw(id)
+        creation = CreationDetail.model_validate_json(raw)
+        return Response(
+            content=creation.model_dump_json(exclude_unset=True), media_type='application/json'
+        )
+    except AfishaUnavailableError:
+        raise
     except Exception:
         logger.error(f'Ошибка при получении произведения с Kinoplan ID {id}', exc_info=True)
         raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
 
 
-@router.get('/creation/{id}/schedule')
+@router.get('/creation/{id}/schedule', response_model=CreationSchedule)
 async def get_creation_schedule(
-    id,
+    id: int,
     params: CreationScheduleFilter = Depends(),
     afisha: AfishaClient = Depends(get_afisha_client),
 ):
     try:
-        cities_response = await afisha.cities.get_list()
-        request_params = transform_params(params=params, cities=cities_response)
-        response = await afisha.creations.get_schedule(id, params=request_params)
-        return response
+        city_index = await afisha.city_directory.get_index()
+        request_params = transform_params(params=params, cities=city_index)
+        raw = await afisha.creations.get_schedule_raw(id, params=request_params)
+        schedule = CreationSchedule.model_validate_json(raw)
+        return Response(
+            content=schedule.model_dump_json(exclude_unset=True), media_type='application/json'
+        )
+    except AfishaUnavailableError:
+        raise
     except Exception:
         logger.error(f'Ошибка при получении расписания произведения с ID {id}', exc_info=True)
         raise HTTPException(status_code=500, detail='Внутренняя ошибка сервера')
@@ -0,0 +1,60 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.dependencies.common import get_afisha_client, get_catalog
+from app.services.afisha import AfishaClient
+from app.services.catalog import LocalCatalog
+from app.utils.metrics import REGISTRY
+from app.utils.profiling import PROFILER
+
+router = APIRouter()
+
+
+def require_debug():
+    if not settings.debug_endpoints_enabled:
+        raise HTTPException(status_code=404, detail='Not Found')
+
+
+@router.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(
+    afisha: AfishaClient = Depends(get_afisha_client),
+    catalog: Optional[LocalCatalog] = Depends(get_catalog),
+):
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail='Not Found')
+    extra = afisha.collect_metrics()
+    if catalog is not None:
+        extra += await catalog.collect_metrics()
+    return PlainTextResponse(
+        REGISTRY.render(extra), media_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@router.get('/debug/slow-requests', include_in_schema=False, dependencies=[Depends(require_debug)])
+async def get_slow_requests(afisha: AfishaClient = Depends(get_afisha_client)):
+    # Журнал свой у каждого воркера
+    return {'threshold': afisha.slow_log.threshold, 'requests': afisha.slow_log.entries()}
+
+
+@router.get('/debug/profiler', include_in_schema=False, dependencies=[Depends(require_debug)])
+async def get_profiles():
+    return {
+        'enabled': PROFILER.enabled,
+        'available': PROFILER.available,
+        'sample_rate': PROFILER.sample_rate,
+        'profiles': PROFILER.entries(),
+    }
+
+
+@router.put('/debug/profiler', include_in_schema=False, dependencies=[Depends(require_debug)])
+async def set_profiler(enabled: bool, sample_rate: Optional[float] = None):
+    if sample_rate is not None:
+        if not 0 < sample_rate <= 1:
+            raise HTTPException(status_code=422, detail='sample_rate должен быть в (0, 1]')
+        PROFILER.sample_rate = sample_rate
+    if PROFILER.set_enabled(enabled) != enabled:
+        raise HTTPException(status_code=409, detail='Не установлен пакет pyinstrument')
+    return {'enabled': PROFILER.enabled, 'sample_rate': PROFILER.sample_rate}
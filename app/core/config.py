@@ -1,4 +1,6 @@
-from pydantic import Field
+from typing import Optional
+
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -8,15 +10,131 @@ class Settings(BaseSettings):
     version: str = '1.0.0'
     host: str = '0.0.0.0'
     port: int = 8000
+    workers: int = 1  # Процессов uvicorn при запуске через python -m app.server
+    shutdown_timeout: float = 10.0  # Сколько ждать незавершённые запросы при остановке
 
     # Логирование
     log_level: str = 'INFO'
-    log_file: str = 'afisha_api.log'
+    log_file: str = 'afisha_api.log'  # Пустая строка — только stderr
+    log_format: str = 'json'  # json | text
+    log_file_max_bytes: int = 10 * 1024 * 1024
+    log_file_backups: int = 5
+    log_queue_size: int = 10000  # При переполнении записи отбрасываются, а не ждут
+    log_error_burst: int = 20  # Предупреждений и ошибок с одного места за окно
+    log_error_window: float = 10.0
 
     # Внешний API Афиши
     afisha_api_key: str = Field(..., env='AFISHA_API_KEY')
     afisha_widget_key: str = Field(..., env='AFISHA_WIDGET_KEY')
-    afisha_base_url: str = 'https://api.afisha.ru/v1'
+    afisha_base_url: str = 'https://api.afisha.ru/v3'
+
+    # Пул соединений к API Афиши (общий для всех клиентов)
+    afisha_pool_max_connections: int = 100
+    afisha_pool_max_keepalive: int = 20
+    afisha_keepalive_expiry: float = 30.0
+    afisha_connect_timeout: float = 3.0
+    afisha_read_timeout: float = 3.0  # На одну попытку: должен быть меньше afisha_request_deadline
+    afisha_pool_timeout: float = 5.0
+    afisha_http2: bool = False  # Требует пакет h2
+    afisha_pool_warmup: int = 4  # Сколько соединений открыть при старте
+
+    # Кэш ответов API Афиши: 'memory', 'sqlite' (общий для воркеров хоста), 'redis' или 'none'
+    cache_backend: str = 'memory'
+    cache_redis_url: Optional[str] = None
+    cache_sqlite_path: str = 'afisha_cache.sqlite3'
+    cache_max_entries: int = 10000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_stale_ttl: int = 3600  # Сколько хранить запись после истечения TTL для ревалидации
+    cache_ttl_creation: int = 600
+    cache_ttl_schedule: int = 120
+    cache_ttl_list: int = 120  # Страницы списка произведений
+
+    # Прогрев кэша популярных запросов
+    warm_enabled: bool = True
+    warm_interval: float = 15.0  # Период планировщика
+    warm_lead: float = 30.0  # За сколько секунд до истечения TTL обновлять запись
+    warm_budget: int = 50  # Не больше запросов к Афише за проход
+    warm_concurrency: int = 4
+    warm_top_k: int = 200  # Сколько горячих запросов отслеживать
+    warm_min_hits: int = 3  # Реже запрошенное не прогреваем
+    warm_decay_interval: float = 600.0  # Раз в столько секунд популярность затухает вдвое
+
+    # Устойчивость запросов к Афише
+    afisha_retry_attempts: int = 3
+    afisha_retry_base_delay: float = 0.1
+    afisha_retry_max_delay: float = 1.0
+    afisha_request_deadline: float = 8.0  # Общий бюджет на запрос, включая повторы
+    afisha_breaker_failure_threshold: int = 5
+    afisha_breaker_reset_timeout: float = 30.0
+
+    # Ограничение нагрузки на Афишу (на процесс)
+    afisha_rate_limit: float = 20.0  # Запросов в секунду
+    afisha_rate_burst: int = 40
+    afisha_max_concurrency: int = 32
+    afisha_queue_timeout: float = 2.0  # Дольше ждать слот нет смысла — отвечаем 503
+    afisha_max_queue: int = 500
+
+    # Обход всех страниц /creations/page
+    creations_read_ahead: int = 2  # Сколько страниц загружать заранее
+    creations_max_pages: int = 500
+
+    # Пакетная загрузка произведений
+    batch_max_items: int = 50
+    batch_concurrency: int = 8
+
+    # Локальный снимок каталога (SQLite) для выбранных городов
+    catalog_enabled: bool = False
+    catalog_path: str = 'catalog.sqlite3'
+    catalog_cities: list[int] = []
+    catalog_sync_interval: int = 600
+    catalog_schedule_ttl: int = 1800  # Как часто перечитывать расписание произведения
+    catalog_sync_concurrency: int = 4
+    catalog_max_lag: int = 3600  # Старее этого снимок не используется, запросы идут в Афишу
+
+    # Метрики Prometheus (/metrics) и заголовок Server-Timing с разбивкой по фазам
+    metrics_enabled: bool = True
+    server_timing_enabled: bool = False
+
+    # Диагностика: фазы запросов к Афише, медленные запросы и профилировщик
+    debug_endpoints_enabled: bool = False  # /debug/* — не открывать наружу
+    upstream_trace_enabled: bool = True
+    slow_request_threshold: float = 1.0  # Запросы к Афише дольше этого попадают в журнал
+    slow_request_capacity: int = 200
+    profiler_enabled: bool = False  # Требует пакет pyinstrument
+    profiler_sample_rate: float = 0.01
+    profiler_interval: float = 0.001
+    profiler_capacity: int = 20  # Сколько последних профилей хранить
+
+    # Сжатие ответов (zstd и br — если установлены пакеты zstandard и brotli)
+    compression_enabled: bool = True
+    compression_min_size: int = 1024  # Меньшие ответы не сжимаются
+    compression_level: int = 6
+    compression_cache_bytes: int = 16 * 1024 * 1024  # Кэш сжатых ответов по ETag
+    msgpack_enabled: bool = True  # application/msgpack по Accept, требует пакет msgpack
+
+    # Cache-Control наших ответов по шаблону маршрута
+    http_cache_rules: dict[str, str] = {
+        '/cities': 'public, max-age=3600, stale-while-revalidate=86400',
+        '/cities/search': 'public, max-age=3600, stale-while-revalidate=86400',
+        '/city/{city_id}': 'public, max-age=3600, stale-while-revalidate=86400',
+        '/creations/page': 'public, max-age=300, stale-while-revalidate=600',
+        '/creation/{id}': 'public, max-age=600, stale-while-revalidate=3600',
+        '/creation/kinoplan/{id}': 'public, max-age=600, stale-while-revalidate=3600',
+        '/creation/{id}/schedule': 'public, max-age=60, stale-while-revalidate=120',
+    }
+
+    # Кэш справочника городов (секунды)
+    cities_cache_ttl: int = 3600
+    cities_refresh_interval: int = 900
+    # Снимок справочника на диске: новый воркер стартует с ним, не дожидаясь Афиши
+    cities_snapshot_path: str = 'cities_snapshot.json'
+
+    @model_validator(mode='after')
+    def check_timeouts(self):
+        # Иначе зависшее чтение съедает весь бюджет запроса и повторов не бывает
+        if self.afisha_read_timeout >= self.afisha_request_deadline:
+            raise ValueError('afisha_read_timeout должен быть меньше afisha_request_deadline')
+        return self
 
     class Config:
         env_file = '.env'
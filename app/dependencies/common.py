@@ -1,8 +1,15 @@
 # app/dependencies/afisha.py
 
+from typing import Optional
+
 from fastapi import Request
 from app.services.afisha import AfishaClient
+from app.services.catalog import LocalCatalog
 
 
 async def get_afisha_client(request: Request) -> AfishaClient:
     return request.app.state.afisha_client
+
+
+async def get_catalog(request: Request) -> Optional[LocalCatalog]:
+    return getattr(request.app.state, 'catalog', None)
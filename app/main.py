@@ -1,18 +1,36 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.router import router as api_router
 from app.core.config import settings
-from app.services.afisha import AfishaClient
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.http_cache import HTTPCacheMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.msgpack import MsgPackMiddleware
+from app.middleware.profiler import ProfilerMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.services.afisha import AfishaClient, AfishaUnavailableError
+from app.services.catalog import LocalCatalog
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     app.state.afisha_client = AfishaClient()  # Initialize AfishaClient
+    await app.state.afisha_client.start()  # Warm up connection pool and city directory
+    app.state.catalog = LocalCatalog(app.state.afisha_client) if settings.catalog_enabled else None
+    if app.state.catalog is not None:
+        await app.state.catalog.start()  # Background catalog sync
     yield
-    await app.state.afisha_client.close()  # Close AfishaClient on shutdown
+    if app.state.catalog is not None:
+        await app.state.catalog.stop()
+    # Uvicorn уже дождался запросов; дожидаемся начатых обращений к Афише и закрываем пул
+    await app.state.afisha_client.close(drain_timeout=settings.shutdown_timeout)
 
 
 app = FastAPI(
@@ -25,6 +43,28 @@ app = FastAPI(
 
 app.include_router(api_router)
 
+
+@app.exception_handler(AfishaUnavailableError)
+async def afisha_unavailable_handler(request: Request, exc: AfishaUnavailableError):
+    # Недоступность Афиши — ожидаемая ситуация, трейсбек здесь не нужен
+    logger.warning(f'{request.url.path}: {exc}')
+    return JSONResponse(
+        status_code=503,
+        content={'detail': 'Сервис Афиши временно недоступен'},
+        headers={'Retry-After': str(max(1, round(exc.retry_after)))},
+    )
+
+
+# MessagePack внутри HTTP-кэша, чтобы ETag считался по отданному представлению,
+# сжатие — снаружи, чтобы 304 не сжимались и кэш сжатых байтов шёл по ETag
+if settings.msgpack_enabled:
+    app.add_middleware(MsgPackMiddleware)
+app.add_middleware(HTTPCacheMiddleware, rules=settings.http_cache_rules)
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware, server_timing=settings.server_timing_enabled)
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(RequestIdMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['*'],
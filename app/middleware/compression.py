@@ -0,0 +1,196 @@
+import importlib
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+from .http_cache import REPRESENTATION
+from .negotiation import choose
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'text/',
+)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, module, level: int):
+        self._obj = module.Compressor(quality=min(level, 11))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, module, level: int):
+        self._module = module
+        self._obj = module.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(self._module.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def _optional(module_name: str):
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+def available_encoders(level: int) -> dict[str, Callable[[], object]]:
+    # В порядке предпочтения: zstd и brotli — если установлены пакеты zstandard / brotli
+    encoders = {}
+    zstd, brotli = _optional('zstandard'), _optional('brotli')
+    if zstd is not None:
+        encoders['zstd'] = lambda: _Zstd(zstd, level)
+    if brotli is not None:
+        encoders['br'] = lambda: _Brotli(brotli, level)
+    encoders['gzip'] = lambda: _Gzip(level)
+    return encoders
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов по Accept-Encoding (zstd, br, gzip) начиная с `min_size` байт.
+    Сжатые байты ответов с ETag кэшируются по (ETag, кодировка), поэтому повторные
+    ответы не сжимаются заново. Потоковые ответы сжимаются по чанкам.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        min_size: int = settings.compression_min_size,
+        level: int = settings.compression_level,
+        cache_bytes: int = settings.compression_cache_bytes,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.encoders = available_encoders(level)
+        self.cache_bytes = cache_bytes
+        self._cache: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._cache_size = 0
+        self.stats = {'cache_hit': 0, 'compressed': 0}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose(tuple(self.encoders), Headers(scope=scope).get('accept-encoding'))
+        start: Optional[Message] = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if start['status'] == 304:
+                passthrough = True
+                self._not_modified(headers, start.get(REPRESENTATION), encoding)
+                await send(start)
+                await send(message)
+                return
+
+            if encoder is None:
+                content_type = headers.get('content-type', '')
+                if not content_type.startswith(COMPRESSIBLE_TYPES) or start['status'] < 200 \
+                        or start['status'] == 204 or 'content-encoding' in headers:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers.add_vary_header('Accept-Encoding')
+                if encoding is None or (not more_body and len(body) < self.min_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers['Content-Encoding'] = encoding
+                etag = headers.get('etag')
+                if etag:
+                    # Другое представление тех же байтов: ETag становится слабым
+                    headers['ETag'] = etag if etag.startswith('W/') else f'W/{etag}'
+
+                if not more_body:
+                    passthrough = True
+                    compressed = self._compress_cached(etag, encoding, body)
+                    headers['Content-Length'] = str(len(compressed))
+                    await send(start)
+                    await send({'type': 'http.response.body', 'body': compressed})
+                    return
+
+                # Поток: длина заранее неизвестна
+                del headers['content-length']
+                encoder = self.encoders[encoding]()
+                await send(start)
+
+            chunk = encoder.compress(body) if body else b''
+            if not more_body:
+                chunk += encoder.finish()
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _not_modified(self, headers: MutableHeaders, representation, encoding: Optional[str]):
+        # 304 получает те же ETag и Vary, что и ответ 200 с этой же Accept-Encoding
+        if representation is None or 'content-encoding' in headers:
+            return
+        content_type, length = representation
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return
+        headers.add_vary_header('Accept-Encoding')
+        etag = headers.get('etag')
+        if etag and encoding is not None and length >= self.min_size:
+            headers['ETag'] = etag if etag.startswith('W/') else f'W/{etag}'
+
+    def _compress_cached(self, etag: Optional[str], encoding: str, body: bytes) -> bytes:
+        key = (etag.removeprefix('W/'), encoding) if etag else None
+        if key is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats['cache_hit'] += 1
+            return self._cache[key]
+
+        encoder = self.encoders[encoding]()
+        compressed = encoder.compress(body) + encoder.finish()
+        self.stats['compressed'] += 1
+        if key is not None and len(compressed) <= self.cache_bytes:
+            self._cache[key] = compressed
+            self._cache_size += len(compressed)
+            while self._cache_size > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_size -= len(evicted)
+        return compressed
@@ -0,0 +1,86 @@
+import hashlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+# Ключ сообщения http.response.start у 304: (Content-Type, длина тела) ответа 200
+REPRESENTATION = 'http_cache.representation'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Для If-None-Match сравнение слабое: W/"x" совпадает с "x"
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag.removeprefix('W/') in candidates
+
+
+class HTTPCacheMiddleware:
+    """
+    Кэширование ответов на стороне клиентов и CDN: сильный ETag по байтам ответа,
+    304 на совпавший If-None-Match и Cache-Control по шаблону маршрута.
+    Потоковые ответы (несколько чанков тела) пропускаются без изменений.
+    В сообщении 304 остаются тип и длина тела ответа 200 (`REPRESENTATION`): по ним
+    внешнее сжатие выставляет 304 те же ETag и Vary, что были бы у 200.
+    """
+
+    def __init__(self, app: ASGIApp, rules: Optional[dict[str, str]] = None):
+        self.app = app
+        self.rules = rules or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get('if-none-match')
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+
+            passthrough = True
+            body = message.get('body', b'')
+            if start['status'] != 200 or message.get('more_body', False):
+                await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            # Маршрут известен только после роутинга, поэтому правило ищем здесь
+            route = scope.get('route')
+            cache_control = self.rules.get(getattr(route, 'path', None))
+            if cache_control and 'cache-control' not in headers:
+                headers['Cache-Control'] = cache_control
+            etag = headers.get('etag') or make_etag(body)
+            headers['ETag'] = etag
+
+            if etag_matches(if_none_match, etag):
+                start[REPRESENTATION] = (headers.get('content-type', ''), len(body))
+                del headers['content-length']
+                if 'content-type' in headers:
+                    del headers['content-type']
+                start['status'] = 304
+                await send(start)
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
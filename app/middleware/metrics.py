@@ -0,0 +1,56 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_RESPONSE_SIZE,
+    server_timing_header,
+    start_timings,
+)
+
+
+class MetricsMiddleware:
+    """
+    Время обработки и размер ответа по шаблону маршрута. С `server_timing` в ответ
+    добавляется Server-Timing: сколько заняли Афиша, поиск города, разбор и сериализация.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = start_timings()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        'Server-Timing',
+                        server_timing_header(timings, time.perf_counter() - started),
+                    )
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Метки — шаблон маршрута, а не сырой путь, иначе id раздуют число рядов
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, route=route, method=scope['method'], status=status
+            )
+            HTTP_RESPONSE_SIZE.observe(size, route=route)
@@ -0,0 +1,75 @@
+import importlib
+import json
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .negotiation import parse_qvalues
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def _load_msgpack():
+    try:
+        return importlib.import_module('msgpack')
+    except ImportError:
+        return None
+
+
+def prefers_msgpack(accept: Optional[str]) -> bool:
+    """MessagePack отдаём, только если клиент назвал его явно и не ниже JSON."""
+    accepted = parse_qvalues(accept)
+    msgpack_q = max(accepted.get(name, 0.0) for name in MSGPACK_TYPES)
+    json_q = accepted.get(
+        'application/json', accepted.get('application/*', accepted.get('*/*', 0.0))
+    )
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+class MsgPackMiddleware:
+    """
+    Ответ в MessagePack вместо JSON по заголовку Accept. Работает, если установлен
+    пакет msgpack; иначе ответы не меняются. Потоковые ответы не перекодируются.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.msgpack = _load_msgpack()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or self.msgpack is None:
+            await self.app(scope, receive, send)
+            return
+
+        use_msgpack = prefers_msgpack(Headers(scope=scope).get('accept'))
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+
+            passthrough = True
+            headers = MutableHeaders(scope=start)
+            if not headers.get('content-type', '').startswith('application/json'):
+                await send(start)
+                await send(message)
+                return
+
+            headers.add_vary_header('Accept')
+            body = message.get('body', b'')
+            if use_msgpack and body and not message.get('more_body', False):
+                body = self.msgpack.packb(json.loads(body), use_bin_type=True)
+                headers['Content-Type'] = 'application/msgpack'
+                headers['Content-Length'] = str(len(body))
+                message = {'type': 'http.response.body', 'body': body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,32 @@
+from typing import Optional
+
+
+def parse_qvalues(header: Optional[str]) -> dict[str, float]:
+    """Значения Accept / Accept-Encoding с весами: 'gzip;q=0.5, br' -> {'gzip': 0.5, 'br': 1.0}."""
+    values = {}
+    for part in (header or '').split(','):
+        name, *params = (p.strip() for p in part.split(';'))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        values[name.lower()] = q
+    return values
+
+
+def choose(offered: tuple[str, ...], header: Optional[str]) -> Optional[str]:
+    """Первый из вариантов (в порядке предпочтения сервера), который принимает клиент."""
+    accepted = parse_qvalues(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for name in offered:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
@@ -0,0 +1,29 @@
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.logger import request_id_var
+from app.utils.profiling import PROFILER, Profiler
+
+
+class ProfilerMiddleware:
+    """Профилирует долю `sample_rate` запросов, пока профилировщик включён."""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler = PROFILER):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not self.profiler.should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        session = self.profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = getattr(scope.get('route'), 'path', None) or scope['path']
+            self.profiler.finish(
+                session, route, time.perf_counter() - started, request_id_var.get()
+            )
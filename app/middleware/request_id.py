@@ -0,0 +1,44 @@
+import re
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.logger import request_id_var
+
+HEADER = 'X-Request-ID'
+_VALID_ID = re.compile(r'[A-Za-z0-9._:-]{1,128}')
+
+
+class RequestIdMiddleware:
+    """
+    ID запроса для сквозной корреляции логов: берётся из X-Request-ID клиента
+    или прокси, иначе генерируется, и возвращается в том же заголовке ответа.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope['headers']:
+            if name == b'x-request-id':
+                incoming = value.decode('latin-1')
+                break
+        # Чужой ID попадает в логи, поэтому принимаем только безопасный формат
+        request_id = incoming if incoming and _VALID_ID.fullmatch(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: Message):
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message)[HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
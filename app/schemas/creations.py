@@ -1,7 +1,19 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Any, Optional, TypeVar, Union
 
-from pydantic import BaseModel, Field, ValidationInfo, field_validator
+from typing_extensions import TypedDict
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    SerializeAsAny,
+    SkipValidation,
+    TypeAdapter,
+    ValidationInfo,
+    field_validator,
+)
+
+from app.core.config import settings
 
 
 class CreationFilter(BaseModel):  # Фильтрация параметров получаемые самой FastAPI
@@ -27,6 +39,23 @@ class CreationFilter(BaseModel):  # Фильтрация параметров п
     #     return v
 
 
+class CreationStreamFilter(BaseModel):  # Фильтрация параметров выгрузки всего списка
+    city_id: Optional[int] = Field(None, description='ID города для поиска')
+    city_name: Optional[str] = Field(None, description='Название города.')
+    date_from: Optional[str] = Field(
+        None, description='Дата начала периода в формате (YYYY-MM-DD).'
+    )
+    date_to: Optional[str] = Field(
+        None, description='Дата окончания периода в формате (YYYY-MM-DD).'
+    )
+    creation_type: Optional[str] = Field(
+        None, description="Тип произведения 'Concert', 'Movie' и т.д."
+    )
+    limit: Optional[int] = Field(
+        100, description='Размер страницы при запросах к Афише.', ge=1, le=100
+    )
+
+
 class CreationScheduleFilter(BaseModel):  # Фильтрация параметров получаемые самой FastAPI
     city_id: Optional[int] = Field(
         None, description='ID города, по которому фильтруется расписание.'
@@ -73,3 +102,115 @@ class CreationScheduleRequest(BaseModel):  # Фильтрация парамет
     DateTo: Optional[datetime] = None
     CinemaFormatDateFrom: Optional[datetime] = None
     CinemaFormatDateTo: Optional[datetime] = None
+
+
+# Модели ответов описывают выдачу в OpenAPI. Значения Афиши отдаются как пришли: тип поля
+# попадает только в схему, при разборе и сериализации он не проверяется и не приводится.
+# Список произведений описан через TypedDict: лишние поля Афиши отбрасываются ещё при разборе.
+T = TypeVar('T')
+Upstream = Annotated[SerializeAsAny[T], SkipValidation]
+
+
+class CreationItem(TypedDict, total=False):  # Произведение в списке
+    Id: Upstream[int]
+    Type: Upstream[str]
+    Name: Upstream[str]
+    Genres: Upstream[list[Any]]
+    Description: Upstream[Optional[str]]
+    Rating: Upstream[Optional[float]]
+    ReleaseDate: Upstream[Optional[str]]
+    AgeRestriction: Upstream[Optional[Union[str, int]]]
+    Country: Upstream[Optional[Union[str, list[Any]]]]
+    AfishaId: Upstream[Optional[str]]
+    AfishaCreationUrl: Upstream[Optional[str]]
+
+
+class Pagination(TypedDict):
+    has_more: Upstream[bool]
+    next_cursor: Upstream[Optional[str]]
+    total_count: int
+
+
+class CreationsPage(TypedDict):  # Ответ /creations/page
+    items: list[CreationItem]
+    pagination: Pagination
+
+
+class UpstreamCreationsPage(TypedDict, total=False):  # Ответ Афиши /creations/page
+    Creations: Optional[list[CreationItem]]
+    HasMore: Upstream[bool]
+    NextCursor: Upstream[Optional[str]]
+
+
+# Карточка и расписание разбираются из байтов Афиши сразу в модели: известные поля —
+# атрибуты (Upstream, без приведения типов), остальные поля Афиши сохраняются как extra
+
+
+class CreationDetail(BaseModel):  # Карточка произведения: известные поля + всё остальное от Афиши
+    model_config = ConfigDict(extra='allow')
+
+    Id: Upstream[Optional[int]] = None
+    Type: Upstream[Optional[str]] = None
+    Name: Upstream[Optional[str]] = None
+    Genres: Upstream[Optional[list[Any]]] = None
+    Description: Upstream[Optional[str]] = None
+    Rating: Upstream[Optional[float]] = None
+    ReleaseDate: Upstream[Optional[str]] = None
+    AgeRestriction: Upstream[Optional[Union[str, int]]] = None
+    Country: Upstream[Optional[Union[str, list[Any]]]] = None
+    AfishaId: Upstream[Optional[str]] = None
+    AfishaCreationUrl: Upstream[Optional[str]] = None
+
+
+class ScheduleSession(BaseModel):  # Только для схемы: сеансы не разбираются
+    model_config = ConfigDict(extra='allow')
+
+    Id: Optional[Union[int, str]] = None
+    DateTime: Optional[str] = None
+
+
+class ScheduleItem(BaseModel):  # Сеансы одной площадки; только для схемы
+    model_config = ConfigDict(extra='allow')
+
+    Place: Optional[dict[str, Any]] = None
+    Sessions: Optional[list[ScheduleSession]] = None
+
+
+class CreationSchedule(BaseModel):  # Ответ /creation/{id}/schedule
+    model_config = ConfigDict(extra='allow')
+
+    Schedule: Upstream[Optional[list[ScheduleItem]]] = None
+
+
+class CreationBatchRequest(BaseModel):  # Запрос нескольких произведений за один вызов
+    ids: list[str] = Field(
+        default_factory=list, max_length=settings.batch_max_items, description='ID произведений'
+    )
+    kinoplan_ids: list[str] = Field(
+        default_factory=list,
+        max_length=settings.batch_max_items,
+        description='Kinoplan ID произведений',
+    )
+    include_schedule: bool = Field(True, description='Загрузить и расписание произведений')
+    schedule: CreationScheduleFilter = Field(
+        default_factory=CreationScheduleFilter, description='Фильтр расписания'
+    )
+
+
+class CreationBatchItem(BaseModel):
+    id: str
+    kinoplan: bool = False
+    creation: Optional[Upstream[CreationDetail]] = None
+    schedule: Optional[Upstream[CreationSchedule]] = None
+    error: Optional[str] = Field(None, description="'not_found', 'unavailable' или 'error'")
+
+
+class CreationBatchResponse(BaseModel):
+    items: list[CreationBatchItem]
+
+
+# Валидаторы собираются один раз при импорте и разбирают байты ответа напрямую
+upstream_creations_page_adapter = TypeAdapter(UpstreamCreationsPage)
+creations_page_adapter = TypeAdapter(CreationsPage)
+creation_item_adapter = TypeAdapter(CreationItem)
+creation_batch_adapter = TypeAdapter(CreationBatchResponse)
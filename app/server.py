@@ -0,0 +1,27 @@
+"""
+Точка входа для запуска в несколько процессов:
+
+    WORKERS=4 python -m app.server
+
+Воркеры делят кэш ответов через общее хранилище (CACHE_BACKEND=sqlite или redis)
+и стартуют со снимка справочника городов на диске. Локальный каталог синхронизирует
+только один воркер (блокировка `<CATALOG_PATH>.lock`), остальные читают его снимок.
+"""
+import uvicorn
+
+from app.core.config import settings
+
+
+def main():
+    uvicorn.run(
+        'app.main:app',
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        timeout_graceful_shutdown=settings.shutdown_timeout,
+        proxy_headers=True,
+    )
+
+
+if __name__ == '__main__':
+    main()
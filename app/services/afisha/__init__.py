@@ -1,12 +1,152 @@
+from app.core.config import settings
+from app.utils.metrics import Counter, Gauge, Metric
+
+from .base import build_http_client, warmup_http_client
+from .cache import MemoryCacheBackend, build_cache_backend
 from .cities import CitiesClient
 from .creations import CreationsClient
+from .directory import CityDirectory
+from .exceptions import (
+    AfishaError,
+    AfishaOverloadedError,
+    AfishaUnavailableError,
+    CircuitOpenError,
+)
+from .governor import Priority, UpstreamGovernor
+from .popularity import PopularityTracker
+from .resilience import CircuitBreakers
+from .singleflight import SingleFlight
+from .tracing import SlowRequestLog
+from .warmer import CacheWarmer
+
+__all__ = [
+    'AfishaClient',
+    'AfishaError',
+    'AfishaOverloadedError',
+    'AfishaUnavailableError',
+    'CircuitOpenError',
+    'Priority',
+]
 
 
 class AfishaClient:
     def __init__(self):
-        self.cities = CitiesClient()
-        self.creations = CreationsClient()
+        self.http = build_http_client()
+        self.cache = build_cache_backend()
+        self.inflight = SingleFlight()
+        self.breakers = CircuitBreakers()
+        # Лимиты Афиши общие на сервис, поэтому делятся между воркерами
+        workers = max(1, settings.workers)
+        self.governor = UpstreamGovernor(
+            rate=settings.afisha_rate_limit / workers,
+            burst=max(1, settings.afisha_rate_burst // workers),
+            max_concurrency=max(1, settings.afisha_max_concurrency // workers),
+        )
+        self.slow_log = SlowRequestLog(
+            settings.slow_request_threshold, settings.slow_request_capacity
+        )
+        shared = dict(
+            cache=self.cache,
+            inflight=self.inflight,
+            breakers=self.breakers,
+            governor=self.governor,
+            slow_log=self.slow_log,
+        )
+        self.cities = CitiesClient(self.http, **shared)
+        self.popularity = PopularityTracker(settings.warm_top_k)
+        self.creations = CreationsClient(self.http, popularity=self.popularity, **shared)
+        self.city_directory = CityDirectory(self.cities)
+        # Без кэша прогревать нечего
+        self.warmer = (
+            CacheWarmer(self.creations, self.popularity)
+            if settings.warm_enabled and self.cache is not None
+            else None
+        )
+
+    async def start(self):
+        await warmup_http_client(self.http)
+        await self.city_directory.start()
+        if self.warmer is not None:
+            self.warmer.start()
+
+    def collect_metrics(self) -> list[Metric]:
+        """Снимок внутренних счётчиков клиента в виде метрик для `/metrics`."""
+        cache = Counter('afisha_cache_events_total', 'События кэша ответов Афиши', ('event',))
+        if self.cache is not None:
+            for event, count in self.cache.stats.items():
+                cache.inc(count, event=event)
+        cache_size = Gauge('afisha_cache_size', 'Размер кэша ответов в процессе', ('unit',))
+        memory = getattr(self.cache, 'local', self.cache)
+        if isinstance(memory, MemoryCacheBackend):
+            cache_size.set(len(memory), unit='entries')
+            cache_size.set(memory.size, unit='bytes')
+
+        inflight = Counter(
+            'afisha_singleflight_total', 'Склеивание одинаковых запросов', ('result',)
+        )
+        for result, count in self.inflight.stats.items():
+            inflight.inc(count, result=result)
+
+        governor = Counter(
+            'afisha_governor_total', 'Выдача слотов к Афише и отказы по ланам', ('event',)
+        )
+        for event, value in self.governor.stats.items():
+            if not event.startswith('queue_time'):
+                governor.inc(value, event=event)
+        queue_time = Counter(
+            'afisha_governor_queue_seconds_total', 'Суммарное ожидание слота к Афише'
+        )
+        queue_time.inc(self.governor.stats['queue_time_total'])
+        slots = Gauge('afisha_governor_slots', 'Занятые и ожидаемые слоты к Афише', ('state',))
+        slots.set(self.governor.active, state='active')
+        slots.set(self.governor.queued, state='queued')
+
+        breakers = Gauge(
+            'afisha_breaker_open', 'Разомкнут ли предохранитель (0.5 — пробный)', ('endpoint',)
+        )
+        for family, breaker in self.breakers:
+            state = {breaker.OPEN: 1, breaker.HALF_OPEN: 0.5}.get(breaker.state, 0)
+            breakers.set(state, endpoint=family)
+
+        warm = Counter('afisha_warm_total', 'Прогрев кэша популярных запросов', ('result',))
+        for result, count in (self.warmer.stats if self.warmer else {}).items():
+            warm.inc(count, result=result)
+
+        slow = Counter('afisha_slow_requests_total', 'Запросы к Афише дольше порога')
+        slow.inc(self.slow_log.stats['captured'])
+
+        return [
+            cache,
+            cache_size,
+            inflight,
+            governor,
+            queue_time,
+            slots,
+            breakers,
+            warm,
+            slow,
+            self._pool(),
+        ]
+
+    def _pool(self) -> Gauge:
+        # Пул httpcore не публикует статистику, смотрим на его соединения напрямую
+        pool = Gauge('afisha_pool_connections', 'Соединения пула к Афише', ('state',))
+        connections = getattr(getattr(self.http, '_transport', None), '_pool', None)
+        connections = getattr(connections, 'connections', [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        pool.set(len(connections) - idle, state='active')
+        pool.set(idle, state='idle')
+        pool.set(settings.afisha_pool_max_connections, state='max')
+        return pool
 
-    async def close(self):
+    async def close(self, drain_timeout: float = 0.0):
+        await self.city_directory.stop()
+        if self.warmer is not None:
+            await self.warmer.stop()
+        if drain_timeout:
+            await self.inflight.drain(drain_timeout)
         await self.cities.close()
         await self.creations.close()
+        await self.http.aclose()
+        if self.cache is not None:
+            await self.cache.close()
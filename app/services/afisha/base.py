@@ -1,26 +1,285 @@
-from httpx import AsyncClient, Response
+import asyncio
+import importlib.util
+import json
+import time
+from typing import Optional, Union
+
+from httpx import AsyncClient, Limits, Response, Timeout
 from app.core.config import settings
+from app.utils.logger import get_logger
+from app.utils.metrics import (
+    UPSTREAM_DURATION,
+    UPSTREAM_PHASE_DURATION,
+    UPSTREAM_RESPONSE_SIZE,
+    timing,
+)
+
+from .cache import CacheBackend, CacheEntry, make_cache_key, parse_cache_control
+from .exceptions import AfishaOverloadedError, AfishaUnavailableError, CircuitOpenError
+from .governor import Priority, Ticket, UpstreamGovernor
+from .resilience import CircuitBreakers, RetryPolicy, endpoint_family, is_retryable
+from .singleflight import SingleFlight
+from .tracing import RequestTrace, SlowRequestLog
+
+logger = get_logger(__name__)
+
+BASE_URL = settings.afisha_base_url
+
+
+def build_http_client() -> AsyncClient:
+    # Один пул соединений на процесс: подклиенты не конкурируют за сокеты и TLS-рукопожатия
+    http2 = settings.afisha_http2
+    if http2 and importlib.util.find_spec('h2') is None:
+        logger.warning('HTTP/2 отключён: не установлен пакет h2 (pip install httpx[http2])')
+        http2 = False
+
+    return AsyncClient(
+        base_url=BASE_URL,
+        http2=http2,
+        limits=Limits(
+            max_connections=settings.afisha_pool_max_connections,
+            max_keepalive_connections=settings.afisha_pool_max_keepalive,
+            keepalive_expiry=settings.afisha_keepalive_expiry,
+        ),
+        timeout=Timeout(
+            connect=settings.afisha_connect_timeout,
+            read=settings.afisha_read_timeout,
+            write=settings.afisha_read_timeout,
+            pool=settings.afisha_pool_timeout,
+        ),
+    )
+
+
+async def warmup_http_client(client: AsyncClient, connections: int = settings.afisha_pool_warmup):
+    # Заранее открываем соединения, чтобы первые запросы не платили за TCP/TLS
+    async def touch():
+        try:
+            await client.head('/')
+        except Exception:
+            logger.warning('Не удалось прогреть соединение с API Афиши', exc_info=True)
+
+    await asyncio.gather(*(touch() for _ in range(connections)))
+
 
 class AfishaBaseClient:
-    BASE_URL = 'https://api.afisha.ru/v3'
+    BASE_URL = BASE_URL
 
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[AsyncClient] = None,
+        cache: Optional[CacheBackend] = None,
+        inflight: Optional[SingleFlight] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        retry: Optional[RetryPolicy] = None,
+        governor: Optional[UpstreamGovernor] = None,
+        slow_log: Optional[SlowRequestLog] = None,
+    ):
         self._headers = {'X-ApiAuth-PartnerKey': settings.afisha_api_key}
         self._params = {'WidgetKey': settings.afisha_widget_key}
-        self.client = AsyncClient(base_url=self.BASE_URL)
+        self._owns_client = http_client is None
+        self.client = http_client or build_http_client()
+        self.cache = cache
+        # У SingleFlight есть __len__: пустой общий экземпляр ложен для `or`
+        self.inflight = inflight if inflight is not None else SingleFlight()
+        self.breakers = breakers or CircuitBreakers()
+        self.retry = retry or RetryPolicy()
+        self.governor = governor or UpstreamGovernor()
+        self.slow_log = slow_log if slow_log is not None else SlowRequestLog(
+            settings.slow_request_threshold, settings.slow_request_capacity
+        )
 
     def _build_params(self, extra: dict = None) -> dict:
         params = {**self._params, **(extra or {})}
         return {k: v for k, v in params.items() if v is not None}
 
-    async def _get(self, endpoint: str, extra_params: dict = None) -> dict:
-        response: Response = await self.client.get(
-            endpoint,
-            headers=self._headers,
-            params=self._build_params(extra_params),
+    async def _get(
+        self,
+        endpoint: str,
+        extra_params: dict = None,
+        cache_ttl: float = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict:
+        return json.loads(await self._get_raw(endpoint, extra_params, cache_ttl, priority))
+
+    async def _get_raw(
+        self,
+        endpoint: str,
+        extra_params: dict = None,
+        cache_ttl: float = None,
+        priority: Priority = Priority.INTERACTIVE,
+        refresh_ahead: float = 0.0,
+    ) -> bytes:
+        with timing('upstream'):
+            return await self._get_cached(
+                endpoint, extra_params, cache_ttl, priority, refresh_ahead
+            )
+
+    async def _get_cached(
+        self,
+        endpoint: str,
+        extra_params: Optional[dict],
+        cache_ttl: Optional[float],
+        priority: Priority,
+        refresh_ahead: float = 0.0,
+    ) -> bytes:
+        # refresh_ahead > 0 — прогрев: запись, которой осталось жить меньше, обновляется заранее
+        key = make_cache_key(endpoint, extra_params)
+        entry = None
+        if self.cache is not None and cache_ttl:
+            entry = await self.cache.get(key)
+            if entry is not None and entry.is_fresh and entry.ttl_left > refresh_ahead:
+                self.cache.stats['warm_skip' if refresh_ahead else 'hit'] += 1
+                return entry.content
+
+        # Одинаковые одновременные промахи ждут один запрос к Афише; если к фоновому
+        # вызову присоединился пользовательский, вызов получает его приоритет
+        ticket = Ticket(priority)
+        return await self.inflight.do(
+            key, lambda: self._fetch(key, endpoint, extra_params, cache_ttl, entry, ticket), ticket
         )
+
+    async def _fetch(
+        self,
+        key: str,
+        endpoint: str,
+        extra_params: Optional[dict],
+        cache_ttl: Optional[float],
+        entry: Optional[CacheEntry],
+        ticket: Ticket,
+    ) -> bytes:
+        # Пока предохранитель разомкнут, отвечаем из устаревшего кэша или сразу отказываем
+        breaker = self.breakers.get(endpoint)
+        if not breaker.allow():
+            if entry is not None:
+                self.cache.stats['stale'] += 1
+                return entry.content
+            raise CircuitOpenError(
+                f'Афиша недоступна: {endpoint_family(endpoint)}', retry_after=breaker.retry_after
+            )
+
+        try:
+            content = await asyncio.wait_for(
+                self._fetch_fresh(key, endpoint, extra_params, cache_ttl, entry, ticket),
+                timeout=settings.afisha_request_deadline,
+            )
+        except AfishaOverloadedError:
+            # Перегрузка на нашей стороне ничего не говорит о здоровье Афиши
+            if entry is not None:
+                self.cache.stats['stale'] += 1
+                return entry.content
+            raise
+        except Exception as e:
+            if not (is_retryable(e) or isinstance(e, asyncio.TimeoutError)):
+                # Ответ 4xx — Афиша работает, ошибка относится к самому запросу
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if entry is not None:
+                self.cache.stats['stale'] += 1
+                logger.warning(f'Афиша не ответила на {endpoint}, отдаём устаревший кэш')
+                return entry.content
+            raise AfishaUnavailableError(
+                f'Афиша не ответила на {endpoint}', retry_after=breaker.retry_after or 1.0
+            ) from e
+
+        breaker.record_success()
+        return content
+
+    async def _fetch_fresh(
+        self,
+        key: str,
+        endpoint: str,
+        extra_params: Optional[dict],
+        cache_ttl: Optional[float],
+        entry: Optional[CacheEntry],
+        ticket: Ticket,
+    ) -> bytes:
+        # Без TTL (или без кэша) ответ не сохраняется
+        if self.cache is None or not cache_ttl:
+            response = await self._request(endpoint, extra_params, priority=ticket)
+            response.raise_for_status()
+            return response.content
+
+        # Устаревшую запись с ETag проверяем условным запросом
+        response = await self._request(
+            endpoint, extra_params, etag=entry and entry.etag, priority=ticket
+        )
+        if response.status_code == 304 and entry is not None:
+            self.cache.stats['revalidated'] += 1
+            await self._store(key, entry.content, entry.etag, response, cache_ttl)
+            return entry.content
+
+        self.cache.stats['miss'] += 1
         response.raise_for_status()
-        return response.json()
+        await self._store(key, response.content, response.headers.get('ETag'), response, cache_ttl)
+        return response.content
+
+    async def _request(
+        self,
+        endpoint: str,
+        extra_params: dict = None,
+        etag: str = None,
+        priority: Union[Priority, Ticket] = Priority.INTERACTIVE,
+    ) -> Response:
+        # Повторяем только временные сбои: сетевые ошибки, 5xx и 429
+        headers = {**self._headers, 'If-None-Match': etag} if etag else self._headers
+        for attempt in range(1, self.retry.attempts + 1):
+            try:
+                async with self.governor.slot(priority):
+                    response = await self._timed_get(endpoint, headers, extra_params)
+                if response.status_code >= 500 or response.status_code == 429:
+                    response.raise_for_status()
+                return response
+            except Exception as e:
+                if attempt == self.retry.attempts or not is_retryable(e):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt))
+
+    async def _timed_get(self, endpoint: str, headers: dict, extra_params: dict) -> Response:
+        # Время и размер ответа по семейству эндпоинта, без id в метках;
+        # фазы запроса — через расширение trace httpcore
+        family = endpoint_family(endpoint)
+        trace = RequestTrace() if settings.upstream_trace_enabled else None
+        started = time.perf_counter()
+        status = 'error'
+        size = 0
+        try:
+            response = await self.client.get(
+                endpoint,
+                headers=headers,
+                params=self._build_params(extra_params),
+                extensions={'trace': trace} if trace else None,
+            )
+            status = str(response.status_code)
+            size = len(response.content)
+            UPSTREAM_RESPONSE_SIZE.observe(size, endpoint=family)
+            return response
+        finally:
+            # Сюда попадают и запросы, прерванные таймаутом или дедлайном
+            duration = time.perf_counter() - started
+            phases = trace.phases if trace else {}
+            UPSTREAM_DURATION.observe(duration, endpoint=family, status=status)
+            for phase, value in phases.items():
+                UPSTREAM_PHASE_DURATION.observe(value, endpoint=family, phase=phase)
+            self.slow_log.record(endpoint, extra_params, status, duration, size, phases)
+
+    async def _store(
+        self, key: str, content: bytes, etag: Optional[str], response: Response, cache_ttl: float
+    ):
+        # Cache-Control от Афиши может только сократить наш TTL
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        if 'no-store' in directives:
+            return
+        ttl = cache_ttl
+        if 'no-cache' in directives:
+            ttl = 0
+        elif directives.get('max-age', '').isdigit():
+            ttl = min(ttl, int(directives['max-age']))
+
+        entry = CacheEntry(content=content, expires_at=time.time() + ttl, etag=etag)
+        await self.cache.set(key, entry, retention=ttl + settings.cache_stale_ttl)
 
     async def close(self):
-        await self.client.aclose()
+        # Общий пул закрывает его владелец (AfishaClient)
+        if self._owns_client:
+            await self.client.aclose()
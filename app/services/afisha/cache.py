@@ -0,0 +1,282 @@
+# services/afisha/cache.py
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+from urllib.parse import urlencode
+
+from app.core.config import settings
+from app.utils.helpers import params_key
+
+
+def make_cache_key(endpoint: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    # Порядок параметров и None-значения не влияют на ключ
+    return _encode_cache_key(endpoint, params_key(params))
+
+
+@lru_cache(maxsize=4096)
+def _encode_cache_key(endpoint: str, items: tuple) -> str:
+    return f'{endpoint}?{urlencode(items)}' if items else endpoint
+
+
+def parse_cache_control(header: Optional[str]) -> dict[str, Optional[str]]:
+    directives = {}
+    for part in (header or '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+@dataclass
+class CacheEntry:
+    content: bytes
+    expires_at: float  # Время по часам стены: запись может читаться другими процессами
+    etag: Optional[str] = None
+    stored_at: float = field(default_factory=time.time)
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def ttl_left(self) -> float:
+        return self.expires_at - time.time()
+
+    def dump(self) -> bytes:
+        meta = {k: v for k, v in asdict(self).items() if k != 'content'}
+        return json.dumps(meta).encode() + b'\n' + self.content
+
+    @classmethod
+    def load(cls, raw: bytes) -> 'CacheEntry':
+        meta, _, content = raw.partition(b'\n')
+        return cls(content=content, **json.loads(meta))
+
+
+class CacheBackend:
+    """Интерфейс хранилища кэша ответов. `retention` — сколько хранить запись, включая устаревание."""
+
+    def __init__(self):
+        self.stats = Counter()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: CacheEntry, retention: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Кэш в памяти процесса с вытеснением LRU по числу записей и суммарному размеру."""
+
+    def __init__(
+        self,
+        max_entries: int = settings.cache_max_entries,
+        max_bytes: int = settings.cache_max_bytes,
+    ):
+        super().__init__()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._data: OrderedDict[str, tuple[CacheEntry, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        entry, drop_at = item
+        if time.time() >= drop_at:
+            self._pop(key)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, retention: float):
+        if key in self._data:
+            self._pop(key)
+        self._data[key] = (entry, time.time() + retention)
+        self._size += len(entry.content)
+        while self._data and (len(self._data) > self._max_entries or self._size > self._max_bytes):
+            self._pop(next(iter(self._data)))
+            self.stats['eviction'] += 1
+
+    async def delete(self, key: str):
+        if key in self._data:
+            self._pop(key)
+
+    def _pop(self, key: str):
+        entry, _ = self._data.pop(key)
+        self._size -= len(entry.content)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Общий для воркеров кэш поверх клиента с интерфейсом redis.asyncio (get/set/delete)."""
+
+    def __init__(self, redis, prefix: str = 'afisha:'):
+        super().__init__()
+        self._redis = redis
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisCacheBackend':
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError('Для cache_backend=redis требуется пакет redis') from e
+        return cls(redis_asyncio.from_url(url), **kwargs)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await self._redis.get(self._prefix + key)
+        return CacheEntry.load(raw) if raw is not None else None
+
+    async def set(self, key: str, entry: CacheEntry, retention: float):
+        await self._redis.set(self._prefix + key, entry.dump(), ex=max(1, int(retention)))
+
+    async def delete(self, key: str):
+        await self._redis.delete(self._prefix + key)
+
+    async def close(self):
+        close = getattr(self._redis, 'aclose', None) or getattr(self._redis, 'close', None)
+        if close is not None:
+            await close()
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Общий кэш воркеров одного хоста в файле SQLite (WAL): запись одного воркера сразу видна
+    остальным, а после перезапуска кэш остаётся горячим. Запросы к файлу идут в отдельном
+    потоке, чтобы не блокировать event loop на блокировке записи.
+    """
+
+    PRUNE_EVERY = 1000  # Раз в столько записей удаляются отслужившие строки
+
+    def __init__(self, path: str = settings.cache_sqlite_path):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._writes = 0
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, retain_until REAL NOT NULL)'
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            'SELECT value FROM cache WHERE key = ? AND retain_until > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes, retain_until: float):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, retain_until) VALUES (?, ?, ?)',
+                (key, value, retain_until),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM cache WHERE retain_until <= ?', (time.time(),))
+
+    def _delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await asyncio.to_thread(self._get, key)
+        return CacheEntry.load(raw) if raw is not None else None
+
+    async def set(self, key: str, entry: CacheEntry, retention: float):
+        await asyncio.to_thread(self._set, key, entry.dump(), time.time() + retention)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+    async def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class TieredCacheBackend(CacheBackend):
+    """
+    Двухуровневый кэш: горячие записи читаются из памяти процесса, промахи — из общего
+    хранилища (файл SQLite или Redis), которое наполняют все воркеры.
+    """
+
+    def __init__(self, local: CacheBackend, shared: CacheBackend):
+        super().__init__()
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = await self.local.get(key)
+        if entry is not None and entry.is_fresh:
+            return entry
+        shared = await self.shared.get(key)
+        if shared is None:
+            return entry
+        if shared.is_fresh:
+            self.stats['shared_hit'] += 1
+        # Запись из общего хранилища (например, от другого воркера) поднимается в память
+        await self.local.set(key, shared, retention=shared.ttl_left + settings.cache_stale_ttl)
+        return shared
+
+    async def set(self, key: str, entry: CacheEntry, retention: float):
+        await self.local.set(key, entry, retention)
+        await self.shared.set(key, entry, retention)
+
+    async def delete(self, key: str):
+        await self.local.delete(key)
+        await self.shared.delete(key)
+
+    async def close(self):
+        await self.local.close()
+        await self.shared.close()
+
+
+def build_cache_backend() -> Optional[CacheBackend]:
+    if settings.cache_backend == 'none':
+        return None
+    if settings.cache_backend == 'redis':
+        if not settings.cache_redis_url:
+            raise RuntimeError('Для cache_backend=redis нужно указать cache_redis_url')
+        return RedisCacheBackend.from_url(settings.cache_redis_url)
+    if settings.cache_backend == 'memory':
+        return MemoryCacheBackend()
+    if settings.cache_backend == 'sqlite':
+        return TieredCacheBackend(MemoryCacheBackend(), SqliteCacheBackend())
+    raise RuntimeError(f'Неизвестный cache_backend: {settings.cache_backend}')
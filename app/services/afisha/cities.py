@@ -2,11 +2,12 @@
 from app.schemas.cities import CitiesRequest
 
 from .base import AfishaBaseClient
+from .governor import Priority
 
 
 class CitiesClient(AfishaBaseClient):
-    async def get_list(self, params: CitiesRequest = None):
-        return await self._get(endpoint='/cities', extra_params=params)
+    async def get_list(self, params: CitiesRequest = None, priority: Priority = Priority.BULK):
+        return await self._get(endpoint='/cities', extra_params=params, priority=priority)
 
-    async def get_by_id(self, city_id: int):
-        return await self._get(endpoint=f'/cities/{city_id}')
+    async def get_by_id(self, city_id: int, priority: Priority = Priority.INTERACTIVE):
+        return await self._get(endpoint=f'/cities/{city_id}', priority=priority)
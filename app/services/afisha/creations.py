@@ -1,20 +1,198 @@
 # services/afisha/creations.py
-from app.schemas.creations import CreationScheduleRequest, CreationsRequest
+import asyncio
+import json
+from typing import AsyncIterator, Iterable, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.schemas.creations import (
+    CreationBatchItem,
+    CreationBatchResponse,
+    CreationDetail,
+    CreationItem,
+    CreationSchedule,
+    CreationScheduleRequest,
+    CreationsRequest,
+    UpstreamCreationsPage,
+    upstream_creations_page_adapter,
+)
+from app.utils.helpers import params_key
+from app.utils.logger import get_logger
 
 from .base import AfishaBaseClient
+from .exceptions import AfishaUnavailableError
+from .governor import Priority
+from .popularity import PopularityTracker
+
+logger = get_logger(__name__)
+
+
+def _batch_error(exc: Exception) -> str:
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 404:
+        return 'not_found'
+    if isinstance(exc, AfishaUnavailableError):
+        return 'unavailable'
+    logger.error('Ошибка при пакетной загрузке произведения', exc_info=exc)
+    return 'error'
 
 
 class CreationsClient(AfishaBaseClient):
-    async def get_list(self, params: CreationsRequest = None):
+    def __init__(self, *args, popularity: Optional[PopularityTracker] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.popularity = popularity
+
+    def _record(self, priority: Priority, key: tuple, payload: tuple):
+        # Популярность считаем только по запросам пользователей, не по фоновым
+        if self.popularity is not None and priority != Priority.PREFETCH:
+            self.popularity.record(key, payload)
+
+    async def get_list(self, params: CreationsRequest = None, priority: Priority = Priority.BULK):
+        return json.loads(await self.get_list_raw(params, priority))
+
+    async def get_list_raw(
+        self,
+        params: CreationsRequest = None,
+        priority: Priority = Priority.BULK,
+        refresh_ahead: float = 0.0,
+    ) -> bytes:
+        # Сырые байты ответа для быстрого пути без промежуточных dict
         if params is None:
-            params = CreationsRequest()
-        return await self._get(endpoint='/creations/page', extra_params=params)
+            params = CreationsRequest().model_dump()
+        self._record(priority, ('list', params_key(params)), ('list', dict(params)))
+        return await self._get_raw(
+            endpoint='/creations/page',
+            extra_params=params,
+            cache_ttl=settings.cache_ttl_list,
+            priority=priority,
+            refresh_ahead=refresh_ahead,
+        )
+
+    async def iter_pages(
+        self,
+        params: CreationsRequest = None,
+        read_ahead: int = settings.creations_read_ahead,
+        max_pages: int = settings.creations_max_pages,
+        priority: Priority = Priority.BULK,
+    ) -> AsyncIterator[UpstreamCreationsPage]:
+        """
+        Обходит все страницы по NextCursor. Следующие страницы (не больше `read_ahead`)
+        загружаются в фоне, пока вызывающий обрабатывает текущую.
+        """
+        params = dict(params or CreationsRequest().model_dump())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, read_ahead))
+        done = object()
+
+        async def produce():
+            try:
+                for _ in range(max_pages):
+                    raw = await self.get_list_raw(params, priority=priority)
+                    page = upstream_creations_page_adapter.validate_json(raw)
+                    await queue.put(page)
+                    cursor = page.get('NextCursor')
+                    if not page.get('HasMore') or not cursor:
+                        break
+                    params['Cursor'] = cursor
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not done:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    async def iter_creations(
+        self, params: CreationsRequest = None, **kwargs
+    ) -> AsyncIterator[CreationItem]:
+        async for page in self.iter_pages(params, **kwargs):
+            for item in page.get('Creations') or []:
+                yield item
+
+    async def get_batch(
+        self,
+        ids: Iterable[str] = (),
+        kinoplan_ids: Iterable[str] = (),
+        include_schedule: bool = True,
+        schedule_params: CreationScheduleRequest = None,
+        concurrency: int = settings.batch_concurrency,
+    ) -> CreationBatchResponse:
+        """
+        Карточки (и расписания) нескольких произведений с ограниченным параллелизмом.
+        Повторы ID схлопываются, ошибка одного произведения не прерывает остальные.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def load(id: str, kinoplan: bool) -> CreationBatchItem:
+            item = CreationBatchItem(id=id, kinoplan=kinoplan)
+            try:
+                async with semaphore:
+                    if kinoplan:
+                        raw = await self.get_by_kinoplan_id_raw(id)
+                    else:
+                        raw = await self.get_by_id_raw(id)
+                # Значения Афиши не приводятся, модели только раскладывают поля
+                item.creation = CreationDetail.model_validate_json(raw)
+
+                creation_id = item.creation.Id if kinoplan else id
+                if include_schedule and creation_id is not None:
+                    async with semaphore:
+                        raw = await self.get_schedule_raw(creation_id, schedule_params)
+                    item.schedule = CreationSchedule.model_validate_json(raw)
+            except Exception as e:
+                item.error = _batch_error(e)
+            return item
+
+        loads = [load(id, False) for id in dict.fromkeys(ids)]
+        loads += [load(id, True) for id in dict.fromkeys(kinoplan_ids)]
+        return CreationBatchResponse(items=await asyncio.gather(*loads))
+
+    async def get_by_id(self, id, priority: Priority = Priority.INTERACTIVE):
+        return json.loads(await self.get_by_id_raw(id, priority))
+
+    async def get_by_id_raw(
+        self, id, priority: Priority = Priority.INTERACTIVE, refresh_ahead: float = 0.0
+    ) -> bytes:
+        self._record(priority, ('creation', str(id)), ('creation', id))
+        return await self._get_raw(
+            endpoint=f'/creations/{id}',
+            cache_ttl=settings.cache_ttl_creation,
+            priority=priority,
+            refresh_ahead=refresh_ahead,
+        )
+
+    async def get_by_kinoplan_id(self, id, priority: Priority = Priority.INTERACTIVE):
+        return json.loads(await self.get_by_kinoplan_id_raw(id, priority))
 
-    async def get_by_id(self, id):
-        return await self._get(endpoint=f'/creations/{id}')
+    async def get_by_kinoplan_id_raw(self, id, priority: Priority = Priority.INTERACTIVE) -> bytes:
+        return await self._get_raw(
+            endpoint=f'/creations/kinoplan/{id}',
+            cache_ttl=settings.cache_ttl_creation,
+            priority=priority,
+        )
 
-    async def get_by_kinoplan_id(self, id):
-        return await self._get(endpoint=f'/creations/kinoplan/{id}')
+    async def get_schedule(
+        self, id, params: CreationScheduleRequest = None, priority: Priority = Priority.INTERACTIVE
+    ):
+        return json.loads(await self.get_schedule_raw(id, params, priority))
 
-    async def get_schedule(self, id, params: CreationScheduleRequest = None):
-        return await self._get(endpoint=f'/creations/{id}/schedule', extra_params=params)
+    async def get_schedule_raw(
+        self,
+        id,
+        params: CreationScheduleRequest = None,
+        priority: Priority = Priority.INTERACTIVE,
+        refresh_ahead: float = 0.0,
+    ) -> bytes:
+        key = ('schedule', str(id), params_key(params))
+        self._record(priority, key, ('schedule', id, dict(params or {})))
+        return await self._get_raw(
+            endpoint=f'/creations/{id}/schedule',
+            extra_params=params,
+            cache_ttl=settings.cache_ttl_schedule,
+            priority=priority,
+            refresh_ahead=refresh_ahead,
+        )
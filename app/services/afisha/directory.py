@@ -0,0 +1,142 @@
+# services/afisha/directory.py
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.city_index import CityIndex
+from app.utils.logger import get_logger
+
+from .cities import CitiesClient
+
+logger = get_logger(__name__)
+
+
+class CityDirectory:
+    """
+    Кэш справочника городов в памяти процесса.
+    Свежий снимок отдаётся сразу, устаревший — тоже сразу, но с фоновым обновлением
+    (stale-while-revalidate). Ждать ответа `/cities` приходится только при холодном кэше.
+    Каждый загруженный снимок сохраняется в `snapshot_path`, и новые воркеры стартуют с него.
+    """
+
+    def __init__(
+        self,
+        client: CitiesClient,
+        ttl: float = settings.cities_cache_ttl,
+        refresh_interval: float = settings.cities_refresh_interval,
+        snapshot_path: Optional[str] = settings.cities_snapshot_path,
+    ):
+        self._client = client
+        self._ttl = ttl
+        self._refresh_interval = refresh_interval
+        self._snapshot_path = snapshot_path or None
+        self._snapshot: Optional[dict] = None
+        self._index: Optional[CityIndex] = None
+        self._loaded_at: float = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._periodic_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_cold(self) -> bool:
+        return self._snapshot is None
+
+    @property
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._loaded_at > self._ttl
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.is_cold else time.monotonic() - self._loaded_at
+
+    async def get(self) -> dict:
+        if self.is_cold:
+            return await self.refresh()
+        if self.is_stale:
+            self._schedule_refresh()
+        return self._snapshot
+
+    async def get_index(self) -> CityIndex:
+        await self.get()
+        return self._index
+
+    async def refresh(self) -> dict:
+        # Параллельные вызовы на холодном кэше ждут одну загрузку
+        loaded_at = self._loaded_at
+        async with self._lock:
+            if self._snapshot is not None and self._loaded_at != loaded_at:
+                return self._snapshot
+            snapshot = await self._client.get_list()
+            self._set(snapshot, time.monotonic())
+            if self._snapshot_path:
+                try:
+                    await asyncio.to_thread(self._save_snapshot, snapshot)
+                except OSError:
+                    logger.warning('Не удалось сохранить снимок справочника городов', exc_info=True)
+            return snapshot
+
+    def _set(self, snapshot: dict, loaded_at: float):
+        # Индекс строится один раз на снимок, а не на каждый запрос
+        self._index = CityIndex.from_payload(snapshot)
+        self._snapshot = snapshot
+        self._loaded_at = loaded_at
+
+    def _save_snapshot(self, snapshot: dict):
+        # Запись через временный файл: воркеры не прочитают снимок наполовину
+        tmp_path = f'{self._snapshot_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': time.time(), 'cities': snapshot}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._snapshot_path)
+
+    def load_snapshot(self) -> bool:
+        if not self._snapshot_path:
+            return False
+        try:
+            with open(self._snapshot_path, encoding='utf-8') as f:
+                saved = json.load(f)
+            age = max(0.0, time.time() - saved['saved_at'])
+            self._set(saved['cities'], time.monotonic() - age)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning('Не удалось прочитать снимок справочника городов', exc_info=True)
+            return False
+        return True
+
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._safe_refresh())
+
+    async def _safe_refresh(self):
+        try:
+            await self.refresh()
+        except Exception:
+            logger.warning('Не удалось обновить справочник городов', exc_info=True)
+
+    async def _run_periodic(self):
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            await self._safe_refresh()
+
+    async def start(self):
+        # Со снимком с диска воркер готов сразу; Афиша нужна, только если снимка нет
+        if not self.load_snapshot():
+            await self._safe_refresh()
+        elif self.is_stale:
+            self._schedule_refresh()
+        if self._periodic_task is None:
+            self._periodic_task = asyncio.create_task(self._run_periodic())
+
+    async def stop(self):
+        for task in (self._periodic_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._periodic_task = None
+        self._refresh_task = None
@@ -0,0 +1,21 @@
+# services/afisha/exceptions.py
+
+
+class AfishaError(Exception):
+    pass
+
+
+class AfishaUnavailableError(AfishaError):
+    """Афиша недоступна или перегружена; запрос стоит повторить через `retry_after` секунд."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AfishaUnavailableError):
+    pass
+
+
+class AfishaOverloadedError(AfishaUnavailableError):
+    pass
@@ -0,0 +1,185 @@
+# services/afisha/governor.py
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Optional, Union
+
+from app.core.config import settings
+
+from .exceptions import AfishaOverloadedError
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # Карточка и расписание произведения, которые ждёт пользователь
+    BULK = 1  # Списки и справочники
+    PREFETCH = 2  # Фоновый прогрев и предзагрузка
+
+
+class Ticket:
+    """
+    Приоритет одного запроса к Афише. Его можно поднять, пока запрос ждёт слот:
+    так склеенный вызов обслуживается по лучшему приоритету среди тех, кто его ждёт.
+    """
+
+    __slots__ = ('priority', '_governor', '_entry')
+
+    def __init__(self, priority: Priority = Priority.INTERACTIVE):
+        self.priority = priority
+        self._governor: Optional['UpstreamGovernor'] = None
+        self._entry: Optional[list] = None
+
+    def boost(self, priority: Priority):
+        if priority >= self.priority:
+            return
+        self.priority = priority
+        if self._entry is not None:
+            self._governor._requeue(self)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        # Через сколько секунд появится токен (0 — уже есть)
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self):
+        self._tokens -= 1
+
+
+class UpstreamGovernor:
+    """
+    Ограничитель запросов к Афише: token bucket по частоте и лимит одновременных запросов.
+    Ожидающие обслуживаются по приоритету, а если слот не освободился за `queue_timeout`
+    или очередь переполнена, запрос отклоняется с AfishaOverloadedError (503 + Retry-After).
+    """
+
+    def __init__(
+        self,
+        rate: float = settings.afisha_rate_limit,
+        burst: float = settings.afisha_rate_burst,
+        max_concurrency: int = settings.afisha_max_concurrency,
+        queue_timeout: float = settings.afisha_queue_timeout,
+        max_queue: int = settings.afisha_max_queue,
+    ):
+        self._bucket = TokenBucket(rate, burst)
+        self._max_concurrency = max_concurrency
+        self._queue_timeout = queue_timeout
+        self._max_queue = max_queue
+        self._active = 0
+        # [приоритет, порядковый номер, future]; при повышении приоритета запись
+        # переставляется, а у старой future обнуляется
+        self._waiters: list[list] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = Counter()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if fut is not None and not fut.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: Union[Priority, Ticket] = Priority.INTERACTIVE):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: Union[Priority, Ticket] = Priority.INTERACTIVE):
+        ticket = priority if isinstance(priority, Ticket) else Ticket(priority)
+        started = time.monotonic()
+        if not self._waiters and self._active < self._max_concurrency:
+            if self._bucket.wait_time() == 0:
+                self._grant()
+                self._record(ticket.priority, started)
+                return
+
+        if len(self._waiters) >= self._max_queue:
+            self.stats[f'shed_{ticket.priority.name.lower()}'] += 1
+            raise AfishaOverloadedError('Очередь запросов к Афише переполнена', self._retry_after())
+
+        fut = asyncio.get_running_loop().create_future()
+        ticket._governor = self
+        ticket._entry = [ticket.priority, next(self._seq), fut]
+        heapq.heappush(self._waiters, ticket._entry)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(fut, self._queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                self.release()  # Слот выдан, но ожидающий уже ушёл
+            else:
+                fut.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats[f'shed_{ticket.priority.name.lower()}'] += 1
+                raise AfishaOverloadedError(
+                    'Превышено время ожидания слота к Афише', self._retry_after()
+                ) from e
+            raise
+        finally:
+            ticket._entry = None
+        self._record(ticket.priority, started)
+
+    def release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def _grant(self):
+        self._bucket.take()
+        self._active += 1
+
+    def _record(self, priority: Priority, started: float):
+        waited = time.monotonic() - started
+        self.stats[f'acquired_{priority.name.lower()}'] += 1
+        self.stats['queue_time_total'] += waited
+        self.stats['queue_time_max'] = max(self.stats['queue_time_max'], waited)
+
+    def _requeue(self, ticket: Ticket):
+        fut = ticket._entry[2]
+        ticket._entry[2] = None
+        ticket._entry = [ticket.priority, next(self._seq), fut]
+        heapq.heappush(self._waiters, ticket._entry)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._waiters and self._active < self._max_concurrency:
+            _, _, fut = self._waiters[0]
+            if fut is None or fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = self._bucket.wait_time()
+            if wait > 0:
+                # Токенов нет — вернёмся, когда бакет пополнится
+                if self._timer is None:
+                    loop = asyncio.get_running_loop()
+                    self._timer = loop.call_later(wait, self._on_timer)
+                return
+            heapq.heappop(self._waiters)
+            self._grant()
+            fut.set_result(None)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _retry_after(self) -> float:
+        return max(1.0, len(self._waiters) / self._bucket.rate)
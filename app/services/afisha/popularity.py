@@ -0,0 +1,73 @@
+# services/afisha/popularity.py
+import heapq
+from array import array
+from typing import Any, Hashable
+
+
+class CountMinSketch:
+    """Приблизительные частоты в фиксированной памяти: оценка не меньше истинной."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self._rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _cells(self, key: Hashable):
+        for row in range(self.depth):
+            yield row, hash((row, key)) % self.width
+
+    def add(self, key: Hashable, count: int = 1) -> int:
+        estimate = None
+        for row, cell in self._cells(key):
+            value = self._rows[row][cell] + count
+            self._rows[row][cell] = value
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        return min(self._rows[row][cell] for row, cell in self._cells(key))
+
+    def decay(self):
+        # Старая популярность затухает: счётчики делятся пополам
+        for row in self._rows:
+            for i, value in enumerate(row):
+                if value:
+                    row[i] = value >> 1
+
+
+class PopularityTracker:
+    """
+    Самые частые запросы к Афише: частоты считает count-min sketch, а кандидатов в горячее
+    множество (ключ и параметры, чтобы повторить запрос) держим не больше 2 * top_k.
+    """
+
+    def __init__(self, top_k: int = 200, width: int = 2048, depth: int = 4):
+        self.top_k = top_k
+        self.sketch = CountMinSketch(width, depth)
+        self._top: dict[Hashable, tuple[int, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._top)
+
+    def record(self, key: Hashable, payload: Any = None):
+        count = self.sketch.add(key)
+        self._top[key] = (count, payload)
+        if len(self._top) > 2 * self.top_k:
+            # Прореживание пачкой: амортизированно O(1) на запись
+            self._top = dict(heapq.nlargest(self.top_k, self._top.items(), key=_count))
+
+    def hot(self, min_count: int = 1) -> list[tuple[Hashable, Any]]:
+        ranked = heapq.nlargest(self.top_k, self._top.items(), key=_count)
+        return [(key, payload) for key, (count, payload) in ranked if count >= min_count]
+
+    def decay(self):
+        self.sketch.decay()
+        self._top = {
+            key: (count >> 1, payload)
+            for key, (count, payload) in self._top.items()
+            if count >> 1
+        }
+
+
+def _count(item: tuple[Hashable, tuple[int, Any]]) -> int:
+    return item[1][0]
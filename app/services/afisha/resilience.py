@@ -0,0 +1,107 @@
+# services/afisha/resilience.py
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+# Всё после /creations/ и /cities/, кроме служебных сегментов, — идентификатор
+_FAMILY = re.compile(r'^/(creations|cities)(/kinoplan)?/(?!page$).+?(/schedule)?$')
+
+
+def endpoint_family(endpoint: str) -> str:
+    # '/creations/123/schedule' и '/creations/abc/schedule' делят один предохранитель:
+    # число семейств (а значит, предохранителей и серий метрик) не зависит от входных ID
+    return _FAMILY.sub(lambda m: f'/{m[1]}{m[2] or ""}/{{id}}{m[3] or ""}', endpoint)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = settings.afisha_retry_attempts
+    base_delay: float = settings.afisha_retry_base_delay
+    max_delay: float = settings.afisha_retry_max_delay
+
+    def delay(self, attempt: int) -> float:
+        # Экспоненциальная задержка с полным джиттером, attempt начинается с 1
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для семейства эндпоинтов: после `failure_threshold` сбоев подряд
+    запросы отклоняются сразу, через `reset_timeout` пропускается одна пробная попытка.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        failure_threshold: int = settings.afisha_breaker_failure_threshold,
+        reset_timeout: float = settings.afisha_breaker_reset_timeout,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    @property
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_after <= 0:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            # Проба, не вернувшая результата (отмена, перегрузка), не блокирует предохранитель навсегда
+            now = time.monotonic()
+            if not self._probe_in_flight or now - self._probe_started > self.reset_timeout:
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class CircuitBreakers:
+    def __init__(self, **breaker_kwargs):
+        self._breaker_kwargs = breaker_kwargs
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def __iter__(self):
+        return iter(self._breakers.items())
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        family = endpoint_family(endpoint)
+        breaker: Optional[CircuitBreaker] = self._breakers.get(family)
+        if breaker is None:
+            breaker = self._breakers[family] = CircuitBreaker(**self._breaker_kwargs)
+        return breaker
@@ -0,0 +1,68 @@
+# services/afisha/singleflight.py
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .governor import Ticket
+
+T = TypeVar('T')
+
+
+class _Call:
+    __slots__ = ('task', 'waiters', 'ticket')
+
+    def __init__(self, task: asyncio.Task, ticket: Optional[Ticket]):
+        self.task = task
+        self.waiters = 0
+        self.ticket = ticket
+
+
+class SingleFlight:
+    """
+    Склеивание одинаковых одновременных запросов: первый вызов с ключом запускает работу,
+    остальные ждут тот же результат. Отмена одного ожидающего не затрагивает других;
+    работа отменяется, только когда её перестали ждать все. С `ticket` общий вызов
+    идёт к Афише с лучшим приоритетом среди ожидающих.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self.stats = Counter()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self, key: str, fn: Callable[[], Awaitable[T]], ticket: Optional[Ticket] = None
+    ) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()), ticket)
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.stats['leader'] += 1
+        else:
+            self.stats['coalesced'] += 1
+            if ticket is not None and call.ticket is not None:
+                call.ticket.boost(ticket.priority)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                self.stats['cancelled'] += 1
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def drain(self, timeout: float):
+        # При остановке даём начатым запросам к Афише завершиться, а не обрываем их
+        tasks = [call.task for call in self._calls.values()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
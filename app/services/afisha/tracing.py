@@ -0,0 +1,80 @@
+# services/afisha/tracing.py
+import time
+from collections import Counter, deque
+from typing import Optional
+
+# Операции httpcore -> фазы запроса. DNS httpcore разрешает внутри connect_tcp,
+# поэтому отдельно он не виден и входит в connect
+PHASES = {
+    'connect_tcp': 'connect',
+    'start_tls': 'tls',
+    'send_request_headers': 'send',
+    'send_request_body': 'send',
+    'receive_response_headers': 'wait',
+    'receive_response_body': 'body',
+}
+
+
+class RequestTrace:
+    """
+    Колбэк расширения `trace` httpx: время фаз одного запроса к Афише.
+    `pool` — ожидание свободного соединения до первой операции с ним.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self._open: dict[str, float] = {}
+
+    async def __call__(self, event: str, info: dict):
+        # Имена вида 'http11.send_request_headers.started'
+        name, _, state = event.partition('.')[2].rpartition('.')
+        phase = PHASES.get(name)
+        if phase is None:
+            return
+        now = time.perf_counter()
+        self.phases.setdefault('pool', now - self.started)
+        if state == 'started':
+            self._open[name] = now
+        elif name in self._open:
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - self._open.pop(name)
+
+
+class SlowRequestLog:
+    """Последние `capacity` запросов к Афише дольше `threshold` секунд, старые вытесняются."""
+
+    def __init__(self, threshold: float = 1.0, capacity: int = 200):
+        self.threshold = threshold
+        self._entries: deque[dict] = deque(maxlen=capacity)
+        self.stats = Counter()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(
+        self,
+        endpoint: str,
+        params: Optional[dict],
+        status: str,
+        duration: float,
+        size: int,
+        phases: dict[str, float],
+    ):
+        if duration < self.threshold:
+            return
+        self.stats['captured'] += 1
+        self._entries.append(
+            {
+                'at': time.time(),
+                'endpoint': endpoint,
+                'params': {k: v for k, v in (params or {}).items() if v is not None},
+                'status': status,
+                'duration': round(duration, 4),
+                'size': size,
+                'phases': {phase: round(value, 4) for phase, value in phases.items()},
+            }
+        )
+
+    def entries(self) -> list[dict]:
+        # Свежие первыми
+        return list(reversed(self._entries))
@@ -0,0 +1,127 @@
+# services/afisha/warmer.py
+import asyncio
+import time
+from collections import Counter
+from typing import Hashable, Optional
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+from .creations import CreationsClient
+from .governor import Priority
+from .popularity import PopularityTracker
+
+logger = get_logger(__name__)
+
+
+class CacheWarmer:
+    """
+    Фоновый прогрев кэша: горячие списки, карточки и расписания перезапрашиваются
+    за `lead` секунд до истечения TTL, чтобы пользовательские запросы попадали в кэш.
+    За один проход — не больше `budget` запросов, все с приоритетом PREFETCH.
+    """
+
+    def __init__(
+        self,
+        creations: CreationsClient,
+        popularity: PopularityTracker,
+        interval: float = settings.warm_interval,
+        lead: float = settings.warm_lead,
+        budget: int = settings.warm_budget,
+        concurrency: int = settings.warm_concurrency,
+        min_hits: int = settings.warm_min_hits,
+        decay_interval: float = settings.warm_decay_interval,
+    ):
+        self.creations = creations
+        self.popularity = popularity
+        self.interval = interval
+        self.lead = lead
+        self.budget = budget
+        self.concurrency = concurrency
+        self.min_hits = min_hits
+        self.decay_interval = decay_interval
+        # Когда ключ снова пора обновлять (по часам monotonic)
+        self._due: dict[Hashable, float] = {}
+        self._decayed_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = Counter()
+
+    def _ttl(self, kind: str) -> float:
+        return {
+            'list': settings.cache_ttl_list,
+            'creation': settings.cache_ttl_creation,
+            'schedule': settings.cache_ttl_schedule,
+        }[kind]
+
+    async def _refresh(self, key: Hashable, payload: tuple):
+        kind, *args = payload
+        if kind == 'list':
+            (params,) = args
+            await self.creations.get_list_raw(
+                params, priority=Priority.PREFETCH, refresh_ahead=self.lead
+            )
+        elif kind == 'creation':
+            (id,) = args
+            await self.creations.get_by_id_raw(
+                id, priority=Priority.PREFETCH, refresh_ahead=self.lead
+            )
+        elif kind == 'schedule':
+            id, params = args
+            await self.creations.get_schedule_raw(
+                id, params, priority=Priority.PREFETCH, refresh_ahead=self.lead
+            )
+        self._due[key] = time.monotonic() + max(0.0, self._ttl(kind) - self.lead)
+
+    async def warm_once(self) -> int:
+        now = time.monotonic()
+        if now - self._decayed_at >= self.decay_interval:
+            self.popularity.decay()
+            self._decayed_at = now
+
+        hot = self.popularity.hot(self.min_hits)
+        due = [(key, payload) for key, payload in hot if self._due.get(key, 0) <= now]
+        if len(due) > self.budget:
+            self.stats['over_budget'] += len(due) - self.budget
+            due = due[: self.budget]
+        # Ключи, выпавшие из горячего множества, больше не отслеживаем
+        hot_keys = {key for key, _ in hot}
+        self._due = {key: at for key, at in self._due.items() if key in hot_keys}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(key: Hashable, payload: tuple):
+            async with semaphore:
+                try:
+                    await self._refresh(key, payload)
+                    self.stats['refreshed'] += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # Ошибки Афиши здесь не важны: повторим в следующем проходе
+                    self.stats['failed'] += 1
+
+        await asyncio.gather(*(refresh(key, payload) for key, payload in due))
+        return len(due)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.warm_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning('Ошибка прогрева кэша', exc_info=True)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.services.afisha import AfishaClient, Priority
+from app.utils.helpers import session_times
+from app.utils.logger import get_logger
+from app.utils.metrics import Counter, Gauge, Metric
+
+from .lock import ProcessLock
+from .store import CatalogStore
+from .whatson import WhatsOnIndex
+
+logger = get_logger(__name__)
+
+CURSOR_PREFIX = 'local-'
+
+
+def is_local_cursor(cursor: Any) -> bool:
+    # Курсор, выданный локальным снимком: 'local-<позиция>'
+    cursor = str(cursor or '')
+    return cursor.startswith(CURSOR_PREFIX) and cursor[len(CURSOR_PREFIX):].isdigit()
+
+
+class LocalCatalog:
+    """
+    Материализованный снимок афиши по городам: фоновая синхронизация обходит
+    `/creations/page` и расписания, а `/creations/page` для этих городов отвечает
+    из локальных индексов без обращения к Афише. Снимок ведёт один воркер хоста
+    (держатель блокировки рядом с файлом снимка), остальные только читают его.
+    """
+
+    def __init__(
+        self,
+        afisha: AfishaClient,
+        path: str = settings.catalog_path,
+        cities: list[int] = settings.catalog_cities,
+    ):
+        self.afisha = afisha
+        self.cities = list(cities)
+        self.store = CatalogStore(path)
+        self.sync_lock = ProcessLock(f'{path}.lock')
+        self.whatson = WhatsOnIndex()
+        # Все записи идут через один поток: одно соединение-писатель SQLite
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='catalog-sync')
+        self._task: Optional[asyncio.Task] = None
+        self.stats: dict[str, Any] = {'syncs': 0, 'sync_errors': 0, 'last_sync_seconds': 0.0}
+
+    async def start(self):
+        # Индекс сеансов поднимается из снимка, оставшегося от прошлого запуска
+        await self._load_index()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.sync_lock.release()
+        self._writer.shutdown(wait=True)
+        self.store.close()
+
+    async def _load_index(self):
+        for city_id in self.cities:
+            sessions = await self._write(self.store.sessions, city_id)
+            types = await self._write(self.store.creation_types, city_id)
+            self.whatson.load(city_id, sessions)
+            self.whatson.set_types(city_id, types)
+
+    async def _run(self):
+        while True:
+            # Синхронизирует один воркер; если он упадёт, блокировку заберёт другой
+            if not await self._write(self.sync_lock.acquire):
+                await self._load_index()
+                await asyncio.sleep(settings.catalog_sync_interval)
+                continue
+            for city_id in self.cities:
+                try:
+                    await self.sync_city(city_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.stats['sync_errors'] += 1
+                    logger.warning(
+                        f'Не удалось синхронизировать каталог города {city_id}', exc_info=True
+                    )
+            await asyncio.sleep(settings.catalog_sync_interval)
+
+    async def _write(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, fn, *args)
+
+    async def sync_city(self, city_id: int):
+        started = time.monotonic()
+        generation = await self._write(self.store.begin_generation, city_id)
+
+        # Список произведений: страницы пишутся по мере получения
+        position = 0
+        async for page in self.afisha.creations.iter_pages(
+            {'CityId': city_id, 'Limit': 100}, priority=Priority.PREFETCH
+        ):
+            items = page.get('Creations') or []
+            types = {item['Id']: item.get('Type') for item in items if 'Id' in item}
+            self.whatson.set_types(city_id, types)
+            await self._write(
+                self.store.upsert_creations,
+                city_id,
+                generation,
+                list(enumerate(items, start=position)),
+            )
+            position += len(items)
+        removed = await self._write(self.store.finish_generation, city_id, generation)
+        self.whatson.remove_creations(city_id, removed)
+
+        # Расписания — только новых, изменившихся и давно не обновлявшихся произведений
+        stale = await self._write(
+            self.store.stale_schedules, city_id, settings.catalog_schedule_ttl
+        )
+        semaphore = asyncio.Semaphore(settings.catalog_sync_concurrency)
+
+        async def sync_schedule(creation_id: int):
+            async with semaphore:
+                raw = await self.afisha.creations.get_schedule_raw(
+                    creation_id, {'CityId': city_id}, priority=Priority.PREFETCH
+                )
+            starts = session_times(json.loads(raw))
+            await self._write(self.store.replace_sessions, city_id, creation_id, starts)
+            self.whatson.update_schedule(city_id, creation_id, starts)
+
+        results = await asyncio.gather(*(sync_schedule(i) for i in stale), return_exceptions=True)
+        failed = sum(isinstance(r, Exception) for r in results)
+        # Снимок считается свежим только вместе с расписаниями
+        await self._write(self.store.mark_synced, city_id, generation)
+
+        self.stats['syncs'] += 1
+        self.stats['last_sync_seconds'] = time.monotonic() - started
+        logger.info(
+            f'Каталог города {city_id}: {position} произведений, удалено {len(removed)}, '
+            f'расписаний обновлено {len(stale) - failed} из {len(stale)}'
+        )
+
+    # Чтения снимка идут в пуле потоков: пока поток синхронизации держит блокировку
+    # записи SQLite, event loop не должен стоять
+
+    async def freshness_lag(self, city_id: int) -> Optional[float]:
+        synced_at = await asyncio.to_thread(self.store.synced_at, city_id)
+        return None if synced_at is None else time.time() - synced_at
+
+    async def collect_metrics(self) -> list[Metric]:
+        lag = Gauge('catalog_freshness_lag_seconds', 'Возраст снимка каталога', ('city',))
+        synced = await asyncio.to_thread(self.store.synced_cities)
+        for city_id, synced_at in synced.items():
+            lag.set(time.time() - synced_at, city=city_id)
+        syncs = Counter('catalog_syncs_total', 'Синхронизации каталога', ('result',))
+        syncs.inc(self.stats['syncs'], result='ok')
+        syncs.inc(self.stats['sync_errors'], result='error')
+        duration = Gauge('catalog_last_sync_seconds', 'Длительность последней синхронизации')
+        duration.set(self.stats['last_sync_seconds'])
+        return [lag, syncs, duration]
+
+    async def can_serve(self, params: dict) -> bool:
+        city_id = params.get('CityId')
+        if city_id not in self.cities:
+            return False
+        # Курсоры Афиши обслуживает только Афиша
+        cursor = params.get('Cursor')
+        if cursor and not is_local_cursor(cursor):
+            return False
+        lag = await self.freshness_lag(city_id)
+        if lag is None:
+            return False
+        # Начатую по снимку выдачу дочитываем из снимка, даже если он успел устареть
+        if cursor:
+            return True
+        if lag > settings.catalog_max_lag:
+            return False
+        # Фильтр по датам без загруженных расписаний вернул бы пустую выдачу
+        if params.get('DateFrom') or params.get('DateTo'):
+            return not await asyncio.to_thread(self.store.has_pending_schedules, city_id)
+        return True
+
+    async def query_page(self, params: dict) -> bytes:
+        """Ответ `/creations/page` в том же формате, что и при проксировании в Афишу."""
+        limit = params.get('Limit') or 20
+        cursor = params.get('Cursor')
+        after = int(cursor[len(CURSOR_PREFIX):]) if cursor else -1
+        city_id = params['CityId']
+        date_from, date_to = params.get('DateFrom'), params.get('DateTo')
+
+        # Окно дат решается индексом сеансов, из SQLite берутся только сами записи
+        creation_ids = None
+        if (date_from or date_to) and city_id in self.whatson:
+            creation_ids = self.whatson.query(
+                city_id, date_from, date_to, params.get('CreationType')
+            )
+            date_from = date_to = None
+
+        rows = await asyncio.to_thread(
+            self.store.query,
+            city_id,
+            date_from=date_from,
+            date_to=date_to,
+            creation_type=params.get('CreationType'),
+            creation_ids=creation_ids,
+            limit=limit + 1,
+            after_position=after,
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        pagination = {
+            'has_more': has_more,
+            'next_cursor': f'{CURSOR_PREFIX}{rows[-1][0]}' if has_more else None,
+            'total_count': len(rows),
+        }
+        # Элементы уже лежат сериализованными — склеиваем байты без разбора
+        return (
+            b'{"items":['
+            + b','.join(payload for _, payload in rows)
+            + b'],"pagination":'
+            + json.dumps(pagination, separators=(',', ':')).encode()
+            + b'}'
+        )
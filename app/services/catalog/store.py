@@ -0,0 +1,231 @@
+# services/catalog/store.py
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS creations (
+    city_id INTEGER NOT NULL,
+    creation_id INTEGER NOT NULL,
+    type TEXT,
+    position INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    generation INTEGER NOT NULL,
+    schedule_synced_at REAL,
+    PRIMARY KEY (city_id, creation_id)
+);
+CREATE INDEX IF NOT EXISTS creations_by_position ON creations (city_id, position);
+CREATE INDEX IF NOT EXISTS creations_by_type ON creations (city_id, type, position);
+CREATE INDEX IF NOT EXISTS creations_pending_schedule ON creations (city_id)
+    WHERE schedule_synced_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS sessions (
+    city_id INTEGER NOT NULL,
+    creation_id INTEGER NOT NULL,
+    starts_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_time ON sessions (city_id, starts_at, creation_id);
+CREATE INDEX IF NOT EXISTS sessions_by_creation ON sessions (city_id, creation_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    city_id INTEGER PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class CatalogStore:
+    """
+    Локальный снимок каталога в SQLite (WAL). Запись идёт из фонового потока синхронизации,
+    чтение — из обработчиков запросов через отдельное соединение на поток.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._connections.append(conn)
+        return conn
+
+    def close(self):
+        for conn in self._connections:
+            conn.close()
+        self._connections.clear()
+        self._local = threading.local()
+
+    # --- Запись (вызывается из потока синхронизации) ---
+
+    def begin_generation(self, city_id: int) -> int:
+        row = self._connect().execute(
+            'SELECT generation FROM sync_state WHERE city_id = ?', (city_id,)
+        ).fetchone()
+        return (row[0] if row else 0) + 1
+
+    def upsert_creations(self, city_id: int, generation: int, items: Iterable[tuple[int, dict]]):
+        # Неизменившиеся записи получают только новое поколение, без перезаписи payload
+        rows = [
+            (city_id, item['Id'], item.get('Type'), position, _dump(item), generation)
+            for position, item in items
+            if item.get('Id') is not None
+        ]
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO creations (city_id, creation_id, type, position, payload, generation)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (city_id, creation_id) DO UPDATE SET
+                    type = excluded.type,
+                    position = excluded.position,
+                    generation = excluded.generation,
+                    payload = excluded.payload,
+                    schedule_synced_at = CASE WHEN payload = excluded.payload
+                        THEN schedule_synced_at ELSE NULL END
+                """,
+                rows,
+            )
+
+    def stale_schedules(self, city_id: int, max_age: float) -> list[int]:
+        rows = self._connect().execute(
+            """
+            SELECT creation_id FROM creations
+            WHERE city_id = ? AND (schedule_synced_at IS NULL OR schedule_synced_at < ?)
+            ORDER BY position
+            """,
+            (city_id, time.time() - max_age),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def replace_sessions(self, city_id: int, creation_id: int, starts: Iterable[datetime]):
+        rows = [(city_id, creation_id, start.isoformat()) for start in starts]
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                'DELETE FROM sessions WHERE city_id = ? AND creation_id = ?', (city_id, creation_id)
+            )
+            conn.executemany(
+                'INSERT INTO sessions (city_id, creation_id, starts_at) VALUES (?, ?, ?)', rows
+            )
+            conn.execute(
+                """
+                UPDATE creations SET schedule_synced_at = ?
+                WHERE city_id = ? AND creation_id = ?
+                """,
+                (time.time(), city_id, creation_id),
+            )
+
+    def finish_generation(self, city_id: int, generation: int) -> list[int]:
+        # Произведения, которых не было в этом обходе, исчезли из афиши.
+        # Поколение и время снимка записывает mark_synced — после прохода по расписаниям
+        with self._write_lock, self._connect() as conn:
+            removed = [
+                row[0]
+                for row in conn.execute(
+                    'SELECT creation_id FROM creations WHERE city_id = ? AND generation < ?',
+                    (city_id, generation),
+                )
+            ]
+            conn.execute(
+                'DELETE FROM creations WHERE city_id = ? AND generation < ?', (city_id, generation)
+            )
+            conn.execute(
+                """
+                DELETE FROM sessions WHERE city_id = ? AND creation_id NOT IN
+                    (SELECT creation_id FROM creations WHERE city_id = ?)
+                """,
+                (city_id, city_id),
+            )
+        return removed
+
+    def mark_synced(self, city_id: int, generation: int):
+        with self._write_lock, self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO sync_state (city_id, generation, synced_at) VALUES (?, ?, ?)
+                ON CONFLICT (city_id) DO UPDATE SET
+                    generation = excluded.generation, synced_at = excluded.synced_at
+                """,
+                (city_id, generation, time.time()),
+            )
+
+    # --- Чтение ---
+
+    def synced_at(self, city_id: int) -> Optional[float]:
+        row = self._connect().execute(
+            'SELECT synced_at FROM sync_state WHERE city_id = ?', (city_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def has_pending_schedules(self, city_id: int) -> bool:
+        # Есть произведения, чьё расписание ещё ни разу не загружено
+        row = self._connect().execute(
+            'SELECT 1 FROM creations WHERE city_id = ? AND schedule_synced_at IS NULL LIMIT 1',
+            (city_id,),
+        ).fetchone()
+        return row is not None
+
+    def synced_cities(self) -> dict[int, float]:
+        return dict(self._connect().execute('SELECT city_id, synced_at FROM sync_state'))
+
+    def sessions(self, city_id: int) -> list[tuple[int, str]]:
+        return self._connect().execute(
+            'SELECT creation_id, starts_at FROM sessions WHERE city_id = ?', (city_id,)
+        ).fetchall()
+
+    def creation_types(self, city_id: int) -> dict[int, Optional[str]]:
+        return dict(
+            self._connect().execute(
+                'SELECT creation_id, type FROM creations WHERE city_id = ?', (city_id,)
+            )
+        )
+
+    def query(
+        self,
+        city_id: int,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        creation_type: Optional[str] = None,
+        creation_ids: Optional[Iterable[int]] = None,
+        limit: int = 20,
+        after_position: int = -1,
+    ) -> list[tuple[int, bytes]]:
+        """Страница (position, payload) в порядке Афиши; даты — ISO-строки, интервал [from, to)."""
+        sql = 'SELECT position, payload FROM creations c WHERE city_id = ? AND position > ?'
+        args: list = [city_id, after_position]
+        if creation_type:
+            sql += ' AND type = ?'
+            args.append(creation_type)
+        if creation_ids is not None:
+            # Одним параметром-JSON: длинный список не упирается в лимит параметров SQLite
+            sql += ' AND creation_id IN (SELECT value FROM json_each(?))'
+            args.append(json.dumps(list(creation_ids)))
+        if date_from or date_to:
+            sql += ' AND EXISTS (SELECT 1 FROM sessions s WHERE s.city_id = c.city_id'
+            sql += ' AND s.creation_id = c.creation_id'
+            if date_from:
+                sql += ' AND s.starts_at >= ?'
+                args.append(date_from)
+            if date_to:
+                sql += ' AND s.starts_at < ?'
+                args.append(date_to)
+            sql += ')'
+        sql += ' ORDER BY position LIMIT ?'
+        args.append(limit)
+        return self._connect().execute(sql, args).fetchall()
+
+
+def _dump(item: dict) -> bytes:
+    return json.dumps(item, ensure_ascii=False, separators=(',', ':')).encode()
@@ -0,0 +1,94 @@
+# services/catalog/whatson.py
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterable, Optional
+
+
+class CityTimeline:
+    """Сеансы одного города: отсортированные времена начала и параллельный список произведений."""
+
+    __slots__ = ('starts', 'creation_ids', 'sessions_by_creation', 'types')
+
+    def __init__(self):
+        self.starts: list[str] = []
+        self.creation_ids: list[int] = []
+        self.sessions_by_creation: dict[int, list[str]] = {}
+        self.types: dict[int, Optional[str]] = {}
+
+    def remove(self, creation_id: int):
+        for start in self.sessions_by_creation.pop(creation_id, []):
+            # Среди сеансов с тем же временем ищем свой
+            pos = bisect_left(self.starts, start)
+            while self.creation_ids[pos] != creation_id:
+                pos += 1
+            del self.starts[pos]
+            del self.creation_ids[pos]
+
+    def add(self, creation_id: int, starts: Iterable[str]):
+        starts = sorted(starts)
+        self.sessions_by_creation[creation_id] = starts
+        for start in starts:
+            pos = bisect_right(self.starts, start)
+            self.starts.insert(pos, start)
+            self.creation_ids.insert(pos, creation_id)
+
+
+class WhatsOnIndex:
+    """
+    Индекс «что идёт» по городам: запрос по окну дат и типу произведения решается
+    двумя бинарными поисками по отсортированным временам сеансов, без SQL и без Афиши.
+    Обновляется инкрементально по мере поступления расписаний.
+    """
+
+    def __init__(self):
+        self._cities: dict[int, CityTimeline] = {}
+
+    def __contains__(self, city_id: int) -> bool:
+        return city_id in self._cities
+
+    def _timeline(self, city_id: int) -> CityTimeline:
+        timeline = self._cities.get(city_id)
+        if timeline is None:
+            timeline = self._cities[city_id] = CityTimeline()
+        return timeline
+
+    def set_types(self, city_id: int, types: dict[int, Optional[str]]):
+        self._timeline(city_id).types.update(types)
+
+    def update_schedule(self, city_id: int, creation_id: int, starts: Iterable[datetime]):
+        timeline = self._timeline(city_id)
+        timeline.remove(creation_id)
+        timeline.add(creation_id, (start.isoformat() for start in starts))
+
+    def load(self, city_id: int, sessions: Iterable[tuple[int, str]]):
+        # Начальная загрузка из снимка: одна сортировка вместо вставок по одному
+        timeline = self._cities[city_id] = CityTimeline()
+        pairs = sorted((start, creation_id) for creation_id, start in sessions)
+        timeline.starts = [start for start, _ in pairs]
+        timeline.creation_ids = [creation_id for _, creation_id in pairs]
+        for start, creation_id in pairs:
+            timeline.sessions_by_creation.setdefault(creation_id, []).append(start)
+
+    def remove_creations(self, city_id: int, creation_ids: Iterable[int]):
+        timeline = self._timeline(city_id)
+        for creation_id in creation_ids:
+            timeline.remove(creation_id)
+            timeline.types.pop(creation_id, None)
+
+    def query(
+        self,
+        city_id: int,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        creation_type: Optional[str] = None,
+    ) -> set[int]:
+        """ID произведений с сеансами в [date_from, date_to); даты — ISO-строки."""
+        timeline = self._cities.get(city_id)
+        if timeline is None:
+            return set()
+        lo = bisect_left(timeline.starts, date_from) if date_from else 0
+        hi = bisect_left(timeline.starts, date_to) if date_to else len(timeline.starts)
+        found = set(timeline.creation_ids[lo:hi])
+        if creation_type:
+            found = {i for i in found if timeline.types.get(i) == creation_type}
+        return found
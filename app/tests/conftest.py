@@ -0,0 +1,44 @@
+import os
+
+import httpx
+import pytest
+
+# Ключи нужны только для инициализации настроек, к реальному API тесты не обращаются
+os.environ.setdefault('AFISHA_API_KEY', 'test-api-key')
+os.environ.setdefault('AFISHA_WIDGET_KEY', 'test-widget-key')
+os.environ.setdefault('LOG_FILE', '')
+os.environ.setdefault('CITIES_SNAPSHOT_PATH', '')
+
+
+@pytest.fixture
+def make_client():
+    """
+    Клиент Афиши поверх httpx.MockTransport: make_client(handler, CreationsClient, cache=...).
+    По умолчанию — AfishaBaseClient, остальные аргументы передаются конструктору клиента.
+    """
+    # Импорт здесь: настройки приложения читают окружение, заданное выше
+    from app.services.afisha.base import AfishaBaseClient
+
+    def factory(handler, client_cls=AfishaBaseClient, **kwargs):
+        transport = httpx.MockTransport(handler)
+        http = httpx.AsyncClient(base_url='https://afisha.test', transport=transport)
+        return client_cls(http, **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def stub_afisha(make_client):
+    """Заменитель AfishaClient для маршрутов: клиент произведений и пустой справочник городов."""
+    from app.services.afisha.creations import CreationsClient
+    from app.utils.city_index import CityIndex
+
+    class StubAfisha:
+        def __init__(self, handler):
+            self.creations = make_client(handler, CreationsClient)
+            self.city_directory = self
+
+        async def get_index(self):
+            return CityIndex([])
+
+    return StubAfisha
@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services.afisha.cache import (
+    CacheEntry,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    SqliteCacheBackend,
+    TieredCacheBackend,
+    make_cache_key,
+)
+
+
+class FakeRedis:  # Локальная замена redis.asyncio с тем же интерфейсом
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_make_cache_key_normalizes_params():  # Порядок и None не влияют на ключ
+    assert make_cache_key('/x', {'b': 1, 'a': 'q', 'c': None}) == make_cache_key('/x', {'a': 'q', 'b': 1})
+    assert make_cache_key('/x') == '/x'
+
+
+def test_memory_cache_lru_eviction():  # Вытесняется давно не использованная запись
+    async def scenario():
+        cache = MemoryCacheBackend(max_entries=2, max_bytes=1000)
+        entry = CacheEntry(content=b'{}', expires_at=time.time() + 60)
+        await cache.set('a', entry, retention=60)
+        await cache.set('b', entry, retention=60)
+        await cache.get('a')
+        await cache.set('c', entry, retention=60)
+        return [await cache.get(k) is not None for k in ('a', 'b', 'c')]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+
+
+def test_memory_cache_bounded_by_size():  # Суммарный размер ограничен
+    async def scenario():
+        cache = MemoryCacheBackend(max_entries=100, max_bytes=10)
+        for key in 'abc':
+            await cache.set(key, CacheEntry(content=b'12345', expires_at=time.time() + 60), 60)
+        return len(cache), cache.size
+
+    assert asyncio.run(scenario()) == (2, 10)
+
+
+def test_redis_cache_roundtrip():  # Запись переживает сериализацию в общий кэш
+    async def scenario():
+        cache = RedisCacheBackend(FakeRedis())
+        await cache.set('k', CacheEntry(content=b'{"a": 1}', expires_at=1.0, etag='"v1"'), 60)
+        return await cache.get('k')
+
+    entry = asyncio.run(scenario())
+    assert entry.content == b'{"a": 1}'
+    assert entry.etag == '"v1"'
+
+
+def test_base_client_serves_from_cache(make_client):  # Повторный запрос не уходит в Афишу
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={'Id': 1})
+
+    async def scenario():
+        client = make_client(handler, cache=RedisCacheBackend(FakeRedis()))
+        first = await client._get('/creations/1', cache_ttl=60)
+        second = await client._get('/creations/1', cache_ttl=60)
+        return first, second
+
+    assert asyncio.run(scenario()) == ({'Id': 1}, {'Id': 1})
+    assert len(calls) == 1
+
+
+def test_base_client_revalidates_with_etag(make_client):  # Устаревшая запись проверяется через If-None-Match
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={'Id': 1}, headers={'ETag': '"v1"', 'Cache-Control': 'max-age=0'})
+
+    async def scenario():
+        cache = MemoryCacheBackend()
+        client = make_client(handler, cache=cache)
+        first = await client._get('/creations/1', cache_ttl=60)
+        second = await client._get('/creations/1', cache_ttl=60)
+        return first, second, cache.stats
+
+    first, second, stats = asyncio.run(scenario())
+    assert first == second == {'Id': 1}
+    assert seen == [None, '"v1"']
+    assert stats['revalidated'] == 1
+
+
+def test_base_client_respects_no_store(make_client):  # Ответы с no-store не кэшируются
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={'Id': 1}, headers={'Cache-Control': 'no-store'})
+
+    async def scenario():
+        client = make_client(handler, cache=MemoryCacheBackend())
+        await client._get('/creations/1', cache_ttl=60)
+        await client._get('/creations/1', cache_ttl=60)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_sqlite_cache_shared_between_workers(tmp_path):  # Запись одного воркера видна другому
+    path = str(tmp_path / 'cache.sqlite3')
+
+    async def scenario():
+        first = TieredCacheBackend(MemoryCacheBackend(), SqliteCacheBackend(path))
+        second = TieredCacheBackend(MemoryCacheBackend(), SqliteCacheBackend(path))
+        entry = CacheEntry(content=b'{"Id":1}', expires_at=time.time() + 60, etag='"v1"')
+        await first.set('/creations/1', entry, retention=120)
+        shared = await second.get('/creations/1')
+        promoted = await second.local.get('/creations/1')
+        expired = SqliteCacheBackend(path)
+        await expired.set('/old', entry, retention=-1)
+        missing = await expired.get('/old')
+        for cache in (first, second, expired):
+            await cache.close()
+        return shared, promoted, second.stats, missing
+
+    shared, promoted, stats, missing = asyncio.run(scenario())
+    assert shared.content == b'{"Id":1}' and shared.etag == '"v1"'
+    assert promoted is not None  # Поднята в память второго воркера
+    assert stats['shared_hit'] == 1
+    assert missing is None
@@ -0,0 +1,26 @@
+import asyncio
+
+from app.services.afisha import AfishaClient
+
+
+def test_afisha_client_shares_connection_pool():  # Подклиенты используют один пул соединений
+    async def scenario():
+        afisha = AfishaClient()
+        shared = afisha.cities.client is afisha.creations.client is afisha.http
+        shared = shared and afisha.creations.slow_log is afisha.slow_log
+        await afisha.close()
+        return shared, afisha.http.is_closed
+
+    shared, closed = asyncio.run(scenario())
+    assert shared
+    assert closed
+
+
+def test_afisha_client_shares_singleflight():  # Пустой общий SingleFlight не подменяется своим
+    async def scenario():
+        afisha = AfishaClient()
+        shared = afisha.cities.inflight is afisha.creations.inflight is afisha.inflight
+        await afisha.close()
+        return shared
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services.afisha.cache import CacheEntry, MemoryCacheBackend, make_cache_key
+from app.services.afisha.creations import CreationsClient
+from app.services.afisha.popularity import CountMinSketch, PopularityTracker
+from app.services.afisha.warmer import CacheWarmer
+
+
+def test_count_min_sketch():  # Оценка не меньше истинной частоты и затухает вдвое
+    sketch = CountMinSketch(width=64, depth=4)
+    for _ in range(10):
+        sketch.add('hot')
+    sketch.add('cold')
+    assert sketch.estimate('hot') >= 10
+    assert sketch.estimate('cold') >= 1
+    sketch.decay()
+    assert 5 <= sketch.estimate('hot') < 10
+
+
+def test_popularity_tracker_top_k():  # В горячем множестве остаются самые частые ключи
+    tracker = PopularityTracker(top_k=2)
+    for i in range(20):
+        for _ in range(i):
+            tracker.record(('creation', i), ('creation', i))
+    assert len(tracker) <= 4
+    assert [key for key, _ in tracker.hot()] == [('creation', 19), ('creation', 18)]
+    assert tracker.hot(min_count=100) == []
+
+
+def test_cache_warmer_refreshes_hot_entries_before_expiry(make_client):  # Горячее обновляется до истечения
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={'Id': 1}, headers={'ETag': '"v1"'})
+
+    async def scenario():
+        cache = MemoryCacheBackend()
+        popularity = PopularityTracker(top_k=10)
+        client = make_client(handler, CreationsClient, cache=cache, popularity=popularity)
+        warmer = CacheWarmer(client, popularity, lead=30, budget=10, min_hits=2)
+
+        for _ in range(3):  # Пользователь трижды открыл карточку: один промах, два попадания
+            await client.get_by_id_raw(1)
+        await client.get_by_id_raw(2)  # Редкая карточка не прогревается
+        first = await warmer.warm_once()  # Запись свежая — Афиша не нужна
+
+        # Запись вот-вот истечёт: прогрев обновляет её заранее
+        key = make_cache_key('/creations/1')
+        entry = await cache.get(key)
+        await cache.set(key, CacheEntry(entry.content, time.time() + 5, entry.etag), 60)
+        warmer._due.clear()
+        second = await warmer.warm_once()
+        refreshed = await cache.get(key)
+        await client.client.aclose()
+        return first, second, refreshed, warmer.stats, cache.stats
+
+    first, second, refreshed, stats, cache_stats = asyncio.run(scenario())
+    assert (first, second) == (1, 1)
+    assert calls == ['/creations/1', '/creations/2', '/creations/1']
+    assert refreshed.ttl_left > 30
+    assert stats['refreshed'] == 2
+    assert cache_stats['warm_skip'] == 1
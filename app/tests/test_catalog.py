@@ -0,0 +1,218 @@
+import asyncio
+import json
+import sqlite3
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.catalog import LocalCatalog
+
+SCHEDULES = {
+    1: ['2025-08-01T19:00:00+03:00'],
+    2: ['2025-08-03T12:00:00'],
+    3: [],
+}
+
+
+def afisha_handler(creations):
+    def handler(request):
+        path = request.url.path
+        if path.endswith('/schedule'):
+            creation_id = int(path.split('/')[-2])
+            sessions = [{'DateTime': t} for t in SCHEDULES[creation_id]]
+            return httpx.Response(200, json={'Schedule': [{'Sessions': sessions}]})
+        return httpx.Response(200, json={'Creations': creations, 'HasMore': False})
+
+    return handler
+
+
+@pytest.fixture
+def make_afisha(stub_afisha):
+    return lambda creations: stub_afisha(afisha_handler(creations))
+
+
+CREATIONS = [
+    {'Id': 1, 'Type': 'Movie', 'Name': 'Фильм', 'Images': ['x']},
+    {'Id': 2, 'Type': 'Concert', 'Name': 'Концерт'},
+    {'Id': 3, 'Type': 'Movie', 'Name': 'Без сеансов'},
+]
+
+
+def test_catalog_sync_and_query(tmp_path, make_afisha):  # Снимок города отвечает на фильтры по типу и датам
+    async def scenario():
+        catalog = LocalCatalog(make_afisha(CREATIONS), path=str(tmp_path / 'c.db'), cities=[2])
+        await catalog.sync_city(2)
+        pages = {
+            'all': await catalog.query_page({'CityId': 2}),
+            'movies': await catalog.query_page({'CityId': 2, 'CreationType': 'Movie'}),
+            'dates': await catalog.query_page(
+                {'CityId': 2, 'DateFrom': '2025-08-01T00:00:00', 'DateTo': '2025-08-02T00:00:00'}
+            ),
+            'first': await catalog.query_page({'CityId': 2, 'Limit': 2}),
+            'next': await catalog.query_page({'CityId': 2, 'Limit': 2, 'Cursor': 'local-1'}),
+        }
+        serve = await catalog.can_serve({'CityId': 2}), await catalog.can_serve({'CityId': 3})
+        await catalog.stop()
+        return {k: json.loads(v) for k, v in pages.items()}, serve
+
+    pages, serve = asyncio.run(scenario())
+    ids = {k: [item['Id'] for item in page['items']] for k, page in pages.items()}
+    assert ids == {'all': [1, 2, 3], 'movies': [1, 3], 'dates': [1], 'first': [1, 2], 'next': [3]}
+    assert pages['all']['items'][0] == {'Id': 1, 'Type': 'Movie', 'Name': 'Фильм'}
+    assert pages['first']['pagination'] == {'has_more': True, 'next_cursor': 'local-1', 'total_count': 2}
+    assert serve == (True, False)
+
+
+def test_catalog_incremental_sync(tmp_path, make_afisha):  # Повторная синхронизация удаляет пропавшее и не перечитывает свежие расписания
+    async def scenario():
+        catalog = LocalCatalog(make_afisha(CREATIONS), path=str(tmp_path / 'c.db'), cities=[2])
+        await catalog.sync_city(2)
+        catalog.afisha = make_afisha(CREATIONS[:2])
+        calls = []
+        get_schedule_raw = catalog.afisha.creations.get_schedule_raw
+
+        async def counting(*args, **kwargs):
+            calls.append(args[0])
+            return await get_schedule_raw(*args, **kwargs)
+
+        catalog.afisha.creations.get_schedule_raw = counting
+        await catalog.sync_city(2)
+        page = json.loads(await catalog.query_page({'CityId': 2}))
+        await catalog.stop()
+        return [item['Id'] for item in page['items']], calls
+
+    ids, schedule_calls = asyncio.run(scenario())
+    assert ids == [1, 2]
+    assert schedule_calls == []
+
+
+def test_catalog_restores_whatson_index(tmp_path, make_afisha):  # После перезапуска индекс сеансов поднимается из снимка
+    async def scenario():
+        path = str(tmp_path / 'c.db')
+        catalog = LocalCatalog(make_afisha(CREATIONS), path=path, cities=[2])
+        await catalog.sync_city(2)
+        await catalog.stop()
+
+        restarted = LocalCatalog(make_afisha(CREATIONS), path=path, cities=[2])
+        await restarted.start()
+        ids = restarted.whatson.query(2, '2025-08-03T00:00:00')
+        await restarted.stop()
+        return ids
+
+    assert asyncio.run(scenario()) == {2}
+
+
+def test_catalog_not_fresh_until_schedules_synced(tmp_path, make_afisha):  # Пока расписания не загружены, фильтр по датам идёт в Афишу
+    dates = {'CityId': 2, 'DateFrom': '2025-08-01T00:00:00', 'DateTo': '2025-08-02T00:00:00'}
+
+    async def scenario():
+        catalog = LocalCatalog(make_afisha(CREATIONS[:2]), path=str(tmp_path / 'c.db'), cities=[2])
+        get_schedule_raw = catalog.afisha.creations.get_schedule_raw
+        release = asyncio.Event()
+
+        async def blocked(*args, **kwargs):
+            await release.wait()
+            return await get_schedule_raw(*args, **kwargs)
+
+        catalog.afisha.creations.get_schedule_raw = blocked
+        sync = asyncio.create_task(catalog.sync_city(2))
+        await asyncio.sleep(0.05)
+        first = await catalog.can_serve({'CityId': 2}), await catalog.can_serve(dates)
+        release.set()
+        await sync
+        synced = await catalog.can_serve({'CityId': 2}), await catalog.can_serve(dates)
+
+        # Новое произведение без расписания: список можно отдать, выборку по датам — нет
+        catalog.afisha = make_afisha(CREATIONS)
+        release.clear()
+        catalog.afisha.creations.get_schedule_raw = blocked
+        sync = asyncio.create_task(catalog.sync_city(2))
+        await asyncio.sleep(0.05)
+        new_item = await catalog.can_serve({'CityId': 2}), await catalog.can_serve(dates)
+        release.set()
+        await sync
+        await catalog.stop()
+        return first, synced, new_item
+
+    first, synced, new_item = asyncio.run(scenario())
+    assert first == (False, False)
+    assert synced == (True, True)
+    assert new_item == (True, False)
+
+
+def test_catalog_sync_lock_single_writer(tmp_path, make_afisha):  # Синхронизирует один воркер, после его остановки — другой
+    async def scenario():
+        path = str(tmp_path / 'c.db')
+        first = LocalCatalog(make_afisha(CREATIONS), path=path, cities=[2])
+        second = LocalCatalog(make_afisha(CREATIONS), path=path, cities=[2])
+        held = first.sync_lock.acquire(), second.sync_lock.acquire()
+        await first.stop()
+        handover = second.sync_lock.acquire()
+        await second.stop()
+        return held, handover
+
+    assert asyncio.run(scenario()) == ((True, False), True)
+
+
+def test_catalog_reads_off_event_loop(tmp_path, make_afisha):  # Медленное чтение снимка не останавливает event loop
+    async def scenario():
+        catalog = LocalCatalog(make_afisha(CREATIONS), path=str(tmp_path / 'c.db'), cities=[2])
+        await catalog.sync_city(2)
+        query = catalog.store.query
+
+        def slow_query(*args, **kwargs):
+            time.sleep(0.05)  # Как будто SQLite ждёт поток синхронизации
+            return query(*args, **kwargs)
+
+        catalog.store.query = slow_query
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        page = json.loads(await catalog.query_page({'CityId': 2}))
+        task.cancel()
+        await catalog.stop()
+        return len(page['items']), ticks
+
+    items, ticks = asyncio.run(scenario())
+    assert items == 3
+    assert ticks > 3
+
+
+def test_catalog_query_many_creation_ids(tmp_path, make_afisha):  # Фильтр по ID не упирается в лимит параметров SQLite
+    async def scenario():
+        catalog = LocalCatalog(make_afisha(CREATIONS), path=str(tmp_path / 'c.db'), cities=[2])
+        await catalog.sync_city(2)
+        # Лимит по умолчанию в старых сборках SQLite
+        catalog.store._connect().setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        ids = [3, 1, *range(1000, 5000)]
+        rows = catalog.store.query(2, creation_ids=ids)
+        empty = catalog.store.query(2, creation_ids=[])
+        await catalog.stop()
+        return [json.loads(payload)['Id'] for _, payload in rows], empty
+
+    assert asyncio.run(scenario()) == ([1, 3], [])
+
+
+def test_catalog_finishes_local_pagination_when_stale(tmp_path, monkeypatch, make_afisha):  # Выданный снимком курсор дочитывается из снимка
+    async def scenario():
+        catalog = LocalCatalog(make_afisha(CREATIONS), path=str(tmp_path / 'c.db'), cities=[2])
+        await catalog.sync_city(2)
+        monkeypatch.setattr(settings, 'catalog_max_lag', -1)
+        serve = (
+            await catalog.can_serve({'CityId': 2}),
+            await catalog.can_serve({'CityId': 2, 'Cursor': 'local-1'}),
+            await catalog.can_serve({'CityId': 2, 'Cursor': 'abc'}),
+        )
+        page = json.loads(await catalog.query_page({'CityId': 2, 'Cursor': 'local-1'}))
+        await catalog.stop()
+        return serve, [item['Id'] for item in page['items']]
+
+    assert asyncio.run(scenario()) == ((False, True, False), [3])
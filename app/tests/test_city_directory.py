@@ -0,0 +1,73 @@
+import asyncio
+
+from app.services.afisha.directory import CityDirectory
+
+
+class FakeCitiesClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_list(self, params=None):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return {'Cities': [{'Id': self.calls, 'Name': 'Москва'}]}
+
+
+def test_city_directory_cold_load_once():  # Параллельные запросы на холодном кэше делают одну загрузку
+    async def scenario():
+        client = FakeCitiesClient()
+        directory = CityDirectory(client, ttl=60, refresh_interval=60)
+        results = await asyncio.gather(*(directory.get() for _ in range(10)))
+        return client.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(r == {'Cities': [{'Id': 1, 'Name': 'Москва'}]} for r in results)
+
+
+def test_city_directory_stale_while_revalidate():  # Устаревший снимок отдаётся сразу, обновление идёт в фоне
+    async def scenario():
+        client = FakeCitiesClient()
+        directory = CityDirectory(client, ttl=0, refresh_interval=60)
+        first = await directory.get()
+        stale = await directory.get()
+        await directory._refresh_task
+        fresh = await directory.get()
+        await directory.stop()
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(scenario())
+    assert stale is first
+    assert fresh['Cities'][0]['Id'] == 2
+
+
+def test_city_directory_start_survives_upstream_error():  # Ошибка при старте не роняет приложение
+    class FailingClient:
+        async def get_list(self, params=None):
+            raise RuntimeError('upstream down')
+
+    async def scenario():
+        directory = CityDirectory(FailingClient(), ttl=60, refresh_interval=60)
+        await directory.start()
+        cold = directory.is_cold
+        await directory.stop()
+        return cold
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_city_directory_warm_start_from_snapshot(tmp_path):  # Новый воркер стартует со снимка
+    path = str(tmp_path / 'cities.json')
+
+    async def scenario():
+        first_client, second_client = FakeCitiesClient(), FakeCitiesClient()
+        first = CityDirectory(first_client, ttl=60, refresh_interval=60, snapshot_path=path)
+        await first.start()
+        await first.stop()
+        second = CityDirectory(second_client, ttl=60, refresh_interval=60, snapshot_path=path)
+        await second.start()
+        index = await second.get_index()
+        await second.stop()
+        return second_client.calls, index.get_id('Москва')
+
+    assert asyncio.run(scenario()) == (0, 1)
@@ -0,0 +1,50 @@
+from app.utils.city_index import CityIndex, normalize_city_name
+from app.utils.helpers import transform_params
+
+cities_data = {
+    'Cities': [
+        {'Id': 2, 'Name': 'Москва'},
+        {'Id': 3, 'Name': 'Санкт-Петербург'},
+        {'Id': 4, 'Name': 'Орёл'},
+        {'Id': 5, 'Name': 'Ростов-на-Дону'},
+        {'Id': 6, 'Name': 'Ростов Великий'},
+    ]
+}
+
+
+def test_normalize_city_name():  # Регистр, ё, дефисы и пробелы не влияют на ключ
+    assert normalize_city_name('  Санкт-Петербург ') == 'санкт петербург'
+    assert normalize_city_name('ОРЁЛ') == 'орел'
+
+
+def test_city_index_exact_variants():  # Поиск ID по разным написаниям имени
+    index = CityIndex.from_payload(cities_data)
+    assert index.get_id('Москва') == 2
+    assert index.get_id('москва ') == 2
+    assert index.get_id('Moskva') == 2
+    assert index.get_id('Орел') == 4
+    assert index.get_id('санкт петербург') == 3
+    assert index.get_id('Неизвестный город') is None
+
+
+def test_city_index_without_translit():  # Транслитерацию можно отключить
+    index = CityIndex.from_payload(cities_data, translit_table=None)
+    assert index.get_id('Moskva') is None
+    assert index.get_id('Москва') == 2
+
+
+def test_city_index_prefix_search():  # Автодополнение по префиксу
+    index = CityIndex.from_payload(cities_data)
+    assert {c['Id'] for c in index.search('рост')} == {5, 6}
+    assert len(index.search('rost', limit=1)) == 1
+
+
+def test_city_index_fuzzy_search():  # Нечёткий поиск при опечатке
+    index = CityIndex.from_payload(cities_data)
+    assert [c['Id'] for c in index.search('Масква')] == [2]
+    assert index.search('Масква', fuzzy=False) == []
+
+
+def test_transform_params_with_index():  # transform_params принимает готовый индекс
+    index = CityIndex.from_payload(cities_data)
+    assert transform_params({'city_name': 'москва'}, index) == {'CityId': 2}
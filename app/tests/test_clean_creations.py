@@ -0,0 +1,116 @@
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+
+from app.dependencies.common import get_afisha_client, get_catalog
+from app.main import app
+from app.schemas.creations import creation_batch_adapter
+from app.utils.helpers import clean_creations, clean_creations_json, session_times
+
+upstream_page = {
+    'Creations': [
+        {'Id': 1, 'Name': 'Фильм', 'Type': 'Movie', 'Images': [{'Url': 'x'}], 'Rating': 7.5},
+        {'Id': 2, 'Name': 'Концерт', 'Persons': []},
+    ],
+    'HasMore': True,
+    'NextCursor': 'abc',
+}
+
+
+def test_clean_creations_projection():  # Остаются только нужные поля, пагинация в нашем формате
+    result = clean_creations(upstream_page)
+    assert result['items'] == [
+        {'Id': 1, 'Type': 'Movie', 'Name': 'Фильм', 'Rating': 7.5},
+        {'Id': 2, 'Name': 'Концерт'},
+    ]
+    assert result['pagination'] == {'has_more': True, 'next_cursor': 'abc', 'total_count': 2}
+
+
+def test_clean_creations_json_matches_dict_path():  # Быстрый путь отдаёт то же, что и обычный
+    raw = json.dumps(upstream_page, ensure_ascii=False).encode()
+    assert json.loads(clean_creations_json(raw)) == clean_creations(upstream_page)
+
+
+def test_clean_creations_json_keeps_upstream_values():  # null и непривычные типы Афиши не ломают страницу и не приводятся
+    raw = json.dumps(
+        {
+            'Creations': [
+                {'Id': '15', 'Name': None, 'Genres': None, 'Rating': 8, 'Persons': []},
+                {'Id': 2, 'AfishaId': 12345, 'Rating': {'Value': 7.5, 'Votes': 10}},
+            ],
+            'HasMore': None,
+        }
+    ).encode()
+    body = clean_creations_json(raw)
+    assert b'"Rating":8}' in body
+    assert json.loads(body)['items'] == [
+        {'Id': '15', 'Name': None, 'Genres': None, 'Rating': 8},
+        {'Id': 2, 'AfishaId': 12345, 'Rating': {'Value': 7.5, 'Votes': 10}},
+    ]
+    assert json.loads(clean_creations_json(b'{"Creations": null}'))['items'] == []
+
+
+def test_session_times_skips_odd_values():  # Нестроковое или битое время сеанса пропускается
+    schedule = {
+        'Schedule': [
+            {'Sessions': [{'DateTime': 5}, {'DateTime': '2025-08-01T19:00:00+03:00'}, {}]},
+            {'Sessions': None},
+            None,
+        ]
+    }
+    assert session_times(schedule) == [datetime(2025, 8, 1, 19, 0)]
+    assert session_times(None) == []
+
+
+def test_creation_routes_pass_upstream_through(stub_afisha):  # Карточка, расписание и пакет отдают данные Афиши без приведения типов
+    creation = {'Id': '15', 'Name': None, 'AfishaId': 12345, 'Rating': {'Value': 8}, 'Persons': []}
+    schedule = {'Schedule': [{'Place': None, 'Sessions': [{'Id': 1, 'DateTime': 1722528000}]}]}
+
+    async def handler(request):
+        return httpx.Response(200, json=schedule if request.url.path.endswith('/schedule') else creation)
+
+    async def scenario():
+        app.dependency_overrides[get_afisha_client] = lambda: stub_afisha(handler)
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                detail = await client.get('/creation/15')
+                sessions = await client.get('/creation/15/schedule')
+                junk = await client.get('/creation/abc')
+        finally:
+            app.dependency_overrides.clear()
+        batch = await stub_afisha(handler).creations.get_batch(ids=['15'])
+        return detail, sessions, junk, batch
+
+    detail, sessions, junk, batch = asyncio.run(scenario())
+    assert detail.status_code == 200
+    assert detail.json() == creation
+    assert sessions.status_code == 200
+    assert sessions.json() == schedule
+    assert junk.status_code == 422  # Нечисловой ID не доходит до Афиши
+    [item] = json.loads(creation_batch_adapter.dump_json(batch, exclude_unset=True))['items']
+    assert item['creation'] == creation
+    assert item['schedule'] == schedule
+
+
+def test_stale_local_cursor_not_sent_upstream(stub_afisha):  # Курсор снимка без снимка — 410, а не запрос в Афишу
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=upstream_page)
+
+    async def scenario():
+        app.dependency_overrides[get_afisha_client] = lambda: stub_afisha(handler)
+        app.dependency_overrides[get_catalog] = lambda: None
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await client.get('/creations/page', params={'city_id': 2, 'cursor': 'local-5'})
+        finally:
+            app.dependency_overrides.clear()
+
+    assert asyncio.run(scenario()).status_code == 410
+    assert calls == []
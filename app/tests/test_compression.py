@@ -0,0 +1,113 @@
+import asyncio
+import gzip
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.http_cache import HTTPCacheMiddleware
+from app.middleware.msgpack import MsgPackMiddleware, prefers_msgpack
+from app.middleware.negotiation import choose, parse_qvalues
+
+app = FastAPI()
+app.add_middleware(MsgPackMiddleware)
+app.add_middleware(HTTPCacheMiddleware)
+app.add_middleware(CompressionMiddleware, min_size=100)
+
+
+@app.get('/big')
+async def get_big():
+    return {'items': [{'id': n, 'name': 'Театр'} for n in range(100)]}
+
+
+@app.get('/small')
+async def get_small():
+    return {'id': 1}
+
+
+@app.get('/stream')
+async def get_stream():
+    async def lines():
+        for n in range(50):
+            yield f'{{"id": {n}}}\n'.encode()
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+
+def request(path: str, **headers) -> httpx.Response:
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(scenario())
+
+
+def test_negotiation():  # Веса, q=0 и предпочтение сервера при равных весах
+    assert parse_qvalues('gzip;q=0.5, br') == {'gzip': 0.5, 'br': 1.0}
+    assert choose(('zstd', 'br', 'gzip'), 'gzip, br') == 'br'
+    assert choose(('zstd', 'br', 'gzip'), 'br;q=0, gzip;q=0.1') == 'gzip'
+    assert choose(('br', 'gzip'), 'identity') is None
+    assert choose(('br', 'gzip'), '*') == 'br'
+    assert prefers_msgpack('application/msgpack, application/json;q=0.9')
+    assert not prefers_msgpack('*/*')
+
+
+def test_gzip_over_threshold():  # Большой ответ сжат, ETag слабый, есть Vary
+    response = request('/big', **{'accept-encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['etag'].startswith('W/"')
+    assert 'Accept-Encoding' in response.headers['vary']
+    assert response.json()['items'][99]['name'] == 'Театр'
+
+    small = request('/small', **{'accept-encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers
+    assert 'Accept-Encoding' in small.headers['vary']
+
+
+def test_not_modified_with_weak_etag():  # Слабый ETag сжатого ответа даёт 304
+    etag = request('/big', **{'accept-encoding': 'gzip'}).headers['etag']
+    response = request('/big', **{'accept-encoding': 'gzip', 'if-none-match': etag})
+    assert response.status_code == 304
+    assert 'content-encoding' not in response.headers
+
+
+def test_not_modified_matches_ok_headers():  # 304 несёт ровно те ETag и Vary, что и 200
+    for path, encoding in (('/big', 'gzip'), ('/big', 'identity'), ('/small', 'gzip')):
+        ok = request(path, **{'accept-encoding': encoding})
+        etag = ok.headers['etag'].removeprefix('W/')
+        not_modified = request(path, **{'accept-encoding': encoding, 'if-none-match': etag})
+        assert not_modified.status_code == 304
+        assert not_modified.headers['etag'] == ok.headers['etag']
+        assert not_modified.headers['vary'] == ok.headers['vary']
+
+
+def test_compressed_bytes_cached():  # Повторный ответ с тем же ETag не сжимается заново
+    middleware = CompressionMiddleware(None, min_size=0)
+    first = middleware._compress_cached('"abc"', 'gzip', b'x' * 1000)
+    second = middleware._compress_cached('W/"abc"', 'gzip', b'x' * 1000)
+    assert first is second
+    assert middleware.stats == {'cache_hit': 1, 'compressed': 1}
+    assert gzip.decompress(first) == b'x' * 1000
+
+    small_cache = CompressionMiddleware(None, cache_bytes=len(first) + 10)
+    small_cache._compress_cached('"a"', 'gzip', b'x' * 1000)
+    small_cache._compress_cached('"b"', 'gzip', b'y' * 1000)
+    assert list(small_cache._cache) == [('"b"', 'gzip')]
+
+
+def test_streaming_compressed():  # Потоковый ответ сжимается по чанкам без Content-Length
+    response = request('/stream', **{'accept-encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in response.headers
+    assert response.text.count('\n') == 50
+
+
+def test_msgpack_response():  # По Accept ответ приходит в MessagePack
+    msgpack = pytest.importorskip('msgpack')
+    response = request('/small', accept='application/msgpack')
+    assert response.headers['content-type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.content) == {'id': 1}
+    assert 'Accept' in response.headers['vary']
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+
+from app.services.afisha.creations import CreationsClient
+
+
+def make_handler(calls):
+    async def handler(request):
+        path = request.url.path
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        if path.endswith('/creations/404'):
+            return httpx.Response(404)
+        if path.endswith('/creations/500'):
+            return httpx.Response(400)
+        if path.endswith('/schedule'):
+            return httpx.Response(200, json={'Schedule': [{'Sessions': [{'Id': 1}]}]})
+        if '/kinoplan/' in path:
+            return httpx.Response(200, json={'Id': 7, 'Name': 'Фильм по Kinoplan'})
+        return httpx.Response(200, json={'Id': int(path.rsplit('/', 1)[-1]), 'Name': 'Фильм'})
+
+    return handler
+
+
+def test_get_batch_with_schedules_and_errors(make_client):  # Ошибки возвращаются по элементам, не роняя весь пакет
+    calls = []
+
+    async def scenario():
+        client = make_client(make_handler(calls), CreationsClient)
+        return await client.get_batch(ids=['1', '404', '1', '500'], kinoplan_ids=['k7'])
+
+    items = {(item.id, item.kinoplan): item for item in asyncio.run(scenario()).items}
+    assert len(items) == 4
+    assert items[('1', False)].creation.Name == 'Фильм'
+    assert items[('1', False)].schedule.Schedule[0]['Sessions'][0]['Id'] == 1
+    assert items[('404', False)].error == 'not_found'
+    assert items[('500', False)].error == 'error'
+    assert items[('k7', True)].creation.Id == 7
+    assert items[('k7', True)].schedule is not None
+    assert '/creations/7/schedule' in calls
+    assert calls.count('/creations/1') == 1
+
+
+def test_get_batch_bounded_concurrency(make_client):  # Одновременно выполняется не больше concurrency запросов
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json={'Id': 1})
+
+    async def scenario():
+        client = make_client(handler, CreationsClient)
+        await client.get_batch(ids=[str(i) for i in range(10)], include_schedule=False, concurrency=3)
+
+    asyncio.run(scenario())
+    assert peak == 3
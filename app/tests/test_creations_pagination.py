@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.afisha.creations import CreationsClient
+from app.utils.helpers import creations_ndjson
+from app.utils.logger import get_logger
+
+
+def make_pages(count):
+    return {
+        str(n): {
+            'Creations': [{'Id': n * 10 + i, 'Name': f'C{n}{i}', 'Images': ['x']} for i in range(2)],
+            'HasMore': n < count - 1,
+            'NextCursor': str(n + 1) if n < count - 1 else None,
+        }
+        for n in range(count)
+    }
+
+
+def make_handler(pages, fetched=None, fail_on=None):
+    def handler(request):
+        cursor = request.url.params.get('Cursor', '0')
+        if fetched is not None:
+            fetched.append(cursor)
+        if cursor == fail_on:
+            return httpx.Response(404)
+        return httpx.Response(200, json=pages[cursor])
+
+    return handler
+
+
+def test_iter_creations_walks_all_pages(make_client):  # Обход идёт по NextCursor до последней страницы
+    async def scenario():
+        client = make_client(make_handler(make_pages(3)), CreationsClient)
+        return [item async for item in client.iter_creations({'CityId': 2})]
+
+    items = asyncio.run(scenario())
+    assert [item['Id'] for item in items] == [0, 1, 10, 11, 20, 21]
+    assert all('Images' not in item for item in items)
+
+
+def test_iter_pages_read_ahead_is_bounded(make_client):  # Заранее загружается не больше read_ahead страниц
+    async def scenario():
+        fetched = []
+        client = make_client(make_handler(make_pages(10), fetched), CreationsClient)
+        pages = client.iter_pages(read_ahead=2)
+        await anext(pages)
+        await asyncio.sleep(0.05)
+        prefetched = len(fetched)
+        await pages.aclose()
+        return prefetched
+
+    # Отдана одна страница, в очереди две, и ещё одна ждёт места в очереди
+    assert asyncio.run(scenario()) <= 4
+
+
+def test_iter_pages_propagates_errors(make_client):  # Ошибка на середине обхода доходит до вызывающего
+    async def scenario():
+        client = make_client(make_handler(make_pages(3), fail_on='1'), CreationsClient)
+        return [page async for page in client.iter_pages()]
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scenario())
+
+
+def test_creations_ndjson():  # По строке на произведение, ошибка посреди потока — последней строкой
+    async def pages():
+        yield {'Creations': [{'Id': 3}]}
+        raise RuntimeError('upstream failed')
+
+    async def scenario():
+        return [chunk async for chunk in creations_ndjson({'Creations': [{'Id': 1}, {'Id': 2}]}, pages(), get_logger('test'))]
+
+    body = b''.join(asyncio.run(scenario())).decode()
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert lines == [{'Id': 1}, {'Id': 2}, {'Id': 3}, {'error': 'upstream_failed'}]
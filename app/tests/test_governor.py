@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.services.afisha.exceptions import AfishaOverloadedError
+from app.services.afisha.governor import Priority, Ticket, TokenBucket, UpstreamGovernor
+
+
+def test_token_bucket_wait_time():  # Пустой бакет сообщает, когда появится токен
+    bucket = TokenBucket(rate=10, burst=1)
+    assert bucket.wait_time() == 0
+    bucket.take()
+    assert 0 < bucket.wait_time() <= 0.1
+
+
+def test_governor_limits_concurrency():  # Одновременно выполняется не больше max_concurrency запросов
+    async def scenario():
+        governor = UpstreamGovernor(rate=1000, burst=1000, max_concurrency=2, queue_timeout=1)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with governor.slot():
+                peak = max(peak, governor.active)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        return peak, governor.active
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_governor_serves_interactive_first():  # Интерактивные запросы обгоняют фоновые в очереди
+    async def scenario():
+        governor = UpstreamGovernor(rate=1000, burst=1000, max_concurrency=1, queue_timeout=1)
+        order = []
+
+        async def work(name, priority):
+            async with governor.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        blocker = asyncio.create_task(work('first', Priority.BULK))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(work('prefetch', Priority.PREFETCH)),
+            asyncio.create_task(work('bulk', Priority.BULK)),
+            asyncio.create_task(work('interactive', Priority.INTERACTIVE)),
+        ]
+        await asyncio.gather(blocker, *tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ['first', 'interactive', 'bulk', 'prefetch']
+
+
+def test_governor_boosted_ticket_moves_ahead():  # Поднятый приоритет ожидающего переставляет его в очереди
+    async def scenario():
+        governor = UpstreamGovernor(rate=1000, burst=1000, max_concurrency=1, queue_timeout=1)
+        order = []
+
+        async def work(name, priority):
+            async with governor.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        ticket = Ticket(Priority.PREFETCH)
+        blocker = asyncio.create_task(work('first', Priority.BULK))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(work('prefetch', ticket)),
+            asyncio.create_task(work('bulk', Priority.BULK)),
+        ]
+        await asyncio.sleep(0)
+        ticket.boost(Priority.INTERACTIVE)
+        ticket.boost(Priority.PREFETCH)  # Понизить приоритет нельзя
+        await asyncio.gather(blocker, *tasks)
+        return order, governor.queued, governor.stats['acquired_interactive']
+
+    assert asyncio.run(scenario()) == (['first', 'prefetch', 'bulk'], 0, 1)
+
+
+def test_governor_sheds_on_queue_timeout():  # Не дождавшийся слота запрос получает 503
+    async def scenario():
+        governor = UpstreamGovernor(rate=1000, burst=1000, max_concurrency=1, queue_timeout=0.01)
+        async with governor.slot():
+            with pytest.raises(AfishaOverloadedError) as e:
+                await governor.acquire(Priority.BULK)
+        return e.value.retry_after, governor.stats['shed_bulk'], governor.active
+
+    retry_after, shed, active = asyncio.run(scenario())
+    assert retry_after >= 1
+    assert shed == 1
+    assert active == 0
+
+
+def test_governor_rate_limit():  # Частота запросов ограничена token bucket
+    async def scenario():
+        governor = UpstreamGovernor(rate=100, burst=1, max_concurrency=10, queue_timeout=1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(4):
+            async with governor.slot():
+                pass
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) >= 0.025
@@ -1,5 +1,8 @@
 import json
-from app.utils.helpers import transform_params
+
+from app.schemas.creations import CreationFilter, CreationScheduleFilter
+from app.utils.city_index import CityIndex
+from app.utils.helpers import _get_city_id, _translate_cached, params_key, transform_params
 
 with open('app/tests/data/cities.json', encoding='utf-8') as f:
     cities_data = json.load(f)
@@ -12,6 +15,16 @@ def test_transform_params_city_name():  # Тест на поиск ID город
     assert result == expected
 
 
+def test_get_city_id_raw_payload_not_indexed(monkeypatch):  # Сырой справочник просматривается без построения индекса
+    def build(*args, **kwargs):
+        raise AssertionError('индекс не должен строиться на каждый вызов')
+
+    monkeypatch.setattr(CityIndex, '__init__', build)
+    assert _get_city_id('Москва', cities_data) == 2
+    assert _get_city_id('Москва', cities_data['Cities']) == 2
+    assert _get_city_id('Неизвестный город', cities_data) is None
+
+
 def test_transform_params_city_id():  # Тест на использование ID города напрямую
     params = {'city_id': 456}
     expected = {'CityId': 456}  # ID города
@@ -74,3 +87,37 @@ def test_transform_params_city_and_dates():  # Тест на преобразо
     }
     result = transform_params(params, cities_data)
     assert result == expected
+
+
+def test_transform_params_cinema_format_dates():  # Даты форматов кино — как обычные даты
+    params = CreationScheduleFilter(
+        city_id=2, cinema_format_date_from='2025-08-01', cinema_format_date_to='2025-08-01'
+    )
+    expected = {
+        'CityId': 2,
+        'CinemaFormatDateFrom': '2025-08-01T00:00:00',
+        'CinemaFormatDateTo': '2025-08-02T00:00:00',
+    }
+    assert transform_params(params) == expected
+
+
+def test_transform_params_model_matches_dict():  # Схема и dict дают одинаковый результат
+    params = {'city_name': 'Москва', 'date_from': '2025-08-01', 'limit': 10, 'cursor': '${cursor}'}
+    model = CreationFilter(**params)
+    expected = {'CityId': 2, 'DateFrom': '2025-08-01T00:00:00', 'Limit': 10}
+    assert transform_params(model, cities_data) == transform_params(params, cities_data) == expected
+
+
+def test_transform_params_memoized():  # Повторные параметры не пересчитываются
+    params = CreationFilter(creation_type='Movie', date_from='2025-09-01')
+    transform_params(params)
+    hits = _translate_cached.cache_info().hits
+    assert transform_params(params) == {
+        'CreationType': 'Movie', 'DateFrom': '2025-09-01T00:00:00', 'Limit': 20
+    }
+    assert _translate_cached.cache_info().hits == hits + 1
+
+
+def test_params_key():  # Каноничный ключ не зависит от порядка и None
+    assert params_key({'b': 1, 'a': 'x', 'c': None}) == params_key({'a': 'x', 'b': 1})
+    assert hash(params_key({'a': 'x'}))
@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.middleware.http_cache import HTTPCacheMiddleware, etag_matches, make_etag
+
+app = FastAPI()
+app.add_middleware(HTTPCacheMiddleware, rules={'/items/{id}': 'public, max-age=60'})
+
+
+@app.get('/items/{id}')
+async def get_item(id: int):
+    return {'id': id}
+
+
+@app.get('/stream')
+async def stream():
+    async def body():
+        yield b'a\n'
+        yield b'b\n'
+
+    return StreamingResponse(body())
+
+
+def request(path, headers=None):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(scenario())
+
+
+def test_etag_matches():  # Слабое сравнение, списки и '*'
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches('*', '"x"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_http_cache_headers():  # ETag по телу и Cache-Control по шаблону маршрута
+    response = request('/items/1')
+    assert response.headers['etag'] == make_etag(response.content)
+    assert response.headers['cache-control'] == 'public, max-age=60'
+
+
+def test_http_cache_not_modified():  # Совпавший If-None-Match даёт 304 без тела
+    etag = request('/items/1').headers['etag']
+    response = request('/items/1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+    assert request('/items/2', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_http_cache_skips_streaming_and_errors():  # Потоковые ответы и ошибки не трогаем
+    assert 'etag' not in request('/stream').headers
+    assert request('/stream').text == 'a\nb\n'
+    assert 'etag' not in request('/missing').headers
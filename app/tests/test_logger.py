@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueListener
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.middleware.request_id import RequestIdMiddleware
+from app.utils.logger import (
+    AsyncQueueHandler,
+    ErrorBurstSampler,
+    JsonFormatter,
+    RequestIdFilter,
+    log_file_path,
+    request_id_var,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def make_logger(name, *filters):
+    log_queue = queue.Queue()
+    handler = AsyncQueueHandler(log_queue)
+    for log_filter in filters:
+        handler.addFilter(log_filter)
+    output = ListHandler()
+    output.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, output)
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger, listener, output
+
+
+def test_queue_handler_formats_traceback_in_listener():  # Трейсбек доходит до слушателя
+    logger, listener, output = make_logger('test.queue', RequestIdFilter())
+    token = request_id_var.set('req-1')
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.error('Ошибка %s', 'обработки', exc_info=True)
+    finally:
+        request_id_var.reset(token)
+
+    record = logger.handlers[0].queue.get_nowait()
+    assert record.exc_info is not None  # Не отформатирован на стороне вызывающего
+    logger.handlers[0].queue.put_nowait(record)
+    listener.start()
+    listener.stop()
+
+    entry = json.loads(output.lines[0])
+    assert entry['message'] == 'Ошибка обработки'
+    assert entry['request_id'] == 'req-1'
+    assert 'ValueError: boom' in entry['exc_info']
+
+
+def test_error_burst_sampler():  # Всплеск с одного места прореживается, счёт отброшенных — в лог
+    logger, listener, output = make_logger('test.burst', ErrorBurstSampler(burst=3, window=60))
+    sampler = logger.handlers[0].filters[0]
+
+    def outage(i):
+        logger.warning(f'Афиша не ответила {i}')
+
+    listener.start()
+    for i in range(10):
+        outage(i)
+    logger.info('info не прореживается')
+    sampler.window = 0  # Окно истекло
+    outage(10)
+    listener.stop()
+
+    entries = [json.loads(line) for line in output.lines]
+    assert [e['message'] for e in entries[:3]] == [f'Афиша не ответила {i}' for i in range(3)]
+    assert entries[3]['message'] == 'info не прореживается'
+    assert entries[4]['message'] == 'Афиша не ответила 10'
+    assert entries[4]['suppressed'] == 7
+
+
+def test_request_id_middleware():  # ID клиента возвращается, без него генерируется новый
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get('/id')
+    async def get_id():
+        return {'request_id': request_id_var.get()}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            given = await client.get('/id', headers={'X-Request-ID': 'abc-123'})
+            generated = await client.get('/id')
+            unsafe = await client.get('/id', headers={'X-Request-ID': 'bad id'})
+            return given, generated, unsafe
+
+    given, generated, unsafe = asyncio.run(scenario())
+    assert given.headers['x-request-id'] == 'abc-123' == given.json()['request_id']
+    assert len(generated.headers['x-request-id']) == 32
+    assert generated.json()['request_id'] == generated.headers['x-request-id']
+    assert unsafe.headers['x-request-id'] != 'bad id'
+
+
+def test_log_file_per_worker(monkeypatch):  # В несколько воркеров каждый пишет и ротирует свой файл
+    monkeypatch.setattr(settings, 'log_file', 'logs/afisha_api.log')
+    monkeypatch.setattr(settings, 'workers', 1)
+    assert log_file_path() == 'logs/afisha_api.log'
+    monkeypatch.setattr(settings, 'workers', 2)
+    assert log_file_path() == f'logs/afisha_api.{os.getpid()}.log'
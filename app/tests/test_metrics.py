@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.middleware.metrics import MetricsMiddleware
+from app.services.afisha import AfishaClient
+from app.utils.metrics import (
+    HTTP_REQUEST_DURATION,
+    UPSTREAM_DURATION,
+    UPSTREAM_RESPONSE_SIZE,
+    Registry,
+    timing,
+)
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware, server_timing=True)
+
+
+@app.get('/items/{id}')
+async def get_item(id: int):
+    with timing('transform'):
+        return {'id': id}
+
+
+def test_histogram_render():  # Кумулятивные корзины, сумма и счётчик в формате Prometheus
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Задержка', ('route',), buckets=(0.1, 1))
+    latency.observe(0.05, route='/a')
+    latency.observe(0.5, route='/a')
+    latency.observe(5, route='/a')
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{route="/a"} 5.55' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+def test_metrics_middleware():  # Задержка по шаблону маршрута и Server-Timing по фазам
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.get('/items/7')
+
+    response = asyncio.run(scenario())
+    assert response.headers['server-timing'].startswith('transform;dur=')
+    assert 'total;dur=' in response.headers['server-timing']
+    samples = {(name, tuple(labels.items())) for name, labels, _ in HTTP_REQUEST_DURATION.samples()}
+    assert (
+        'http_request_duration_seconds_count',
+        (('route', '/items/{id}'), ('method', 'GET'), ('status', '200')),
+    ) in samples
+
+
+def test_afisha_client_metrics():  # Статистика кэша, пула и лимитера видна как метрики
+    async def scenario():
+        afisha = AfishaClient()
+        afisha.cache.stats['hit'] += 2
+        text = Registry().render(afisha.collect_metrics())
+        await afisha.close()
+        return text
+
+    text = asyncio.run(scenario())
+    assert 'afisha_cache_events_total{event="hit"} 2' in text
+    assert 'afisha_pool_connections{state="active"} 0' in text
+    assert 'afisha_governor_slots{state="queued"} 0' in text
+
+
+def test_upstream_labels_do_not_grow_with_ids(make_client):  # Разные ID делят одну серию метрик и один предохранитель
+    async def handler(request):
+        return httpx.Response(200, json={'Id': request.url.path.rsplit('/', 1)[-1]})
+
+    async def scenario():
+        client = make_client(handler)
+        await client._get('/creations/abc')
+        await client._get('/creations/xyz')
+        return client
+
+    client = asyncio.run(scenario())
+    # Из этого же списка строится afisha_breaker_open
+    assert [family for family, _ in client.breakers] == ['/creations/{id}']
+    for metric in (UPSTREAM_DURATION, UPSTREAM_RESPONSE_SIZE):
+        endpoints = {labels['endpoint'] for _, labels, _ in metric.samples()}
+        assert '/creations/{id}' in endpoints
+        assert not any('abc' in e or 'xyz' in e for e in endpoints)
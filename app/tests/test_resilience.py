@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services.afisha.cache import MemoryCacheBackend
+from app.services.afisha.exceptions import AfishaUnavailableError, CircuitOpenError
+from app.services.afisha.resilience import (
+    CircuitBreaker,
+    CircuitBreakers,
+    RetryPolicy,
+    endpoint_family,
+)
+
+NO_DELAY = RetryPolicy(attempts=3, base_delay=0, max_delay=0)
+
+
+def test_endpoint_family():  # ID в пути не порождают отдельные предохранители
+    assert endpoint_family('/creations/123/schedule') == '/creations/{id}/schedule'
+    assert endpoint_family('/creations/kinoplan/k42') == '/creations/kinoplan/{id}'
+    assert endpoint_family('/cities') == '/cities'
+    assert endpoint_family('/cities/abc') == '/cities/{id}'
+    assert endpoint_family('/creations/page') == '/creations/page'
+    assert endpoint_family('/creations/abc') == '/creations/{id}'
+    assert endpoint_family('/creations/a/b/schedule') == '/creations/{id}/schedule'
+    assert endpoint_family('/creations/kinoplan/x/y') == '/creations/kinoplan/{id}'
+
+
+def test_retry_delay_bounded():  # Джиттер не превышает экспоненту и потолок
+    policy = RetryPolicy(attempts=5, base_delay=0.1, max_delay=0.3)
+    assert all(0 <= policy.delay(a) <= min(0.3, 0.1 * 2 ** (a - 1)) for a in range(1, 6))
+
+
+def test_circuit_breaker_opens_and_probes():  # Разомкнутый предохранитель пропускает одну пробу после паузы
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_base_client_retries_transient_errors(make_client):  # 5xx повторяется, успешный ответ возвращается
+    statuses = iter([502, 503, 200])
+
+    def handler(request):
+        status = next(statuses)
+        return httpx.Response(status, json={'ok': status == 200})
+
+    assert asyncio.run(make_client(handler, retry=NO_DELAY)._get('/cities')) == {'ok': True}
+
+
+def test_base_client_does_not_retry_client_errors(make_client):  # 404 не повторяется и не размыкает предохранитель
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    client = make_client(handler, retry=NO_DELAY)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(client._get('/creations/1'))
+    assert len(calls) == 1
+    assert client.breakers.get('/creations/1').state == CircuitBreaker.CLOSED
+
+
+def test_base_client_fails_fast_when_open(make_client):  # После серии сбоев запросы отклоняются без обращения к Афише
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    client = make_client(handler, retry=NO_DELAY, breakers=CircuitBreakers(failure_threshold=1, reset_timeout=60))
+    with pytest.raises(AfishaUnavailableError):
+        asyncio.run(client._get('/creations/1'))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client._get('/creations/2'))
+    assert len(calls) == 3
+
+
+def test_base_client_serves_stale_on_failure(make_client):  # При сбое Афиши отдаётся устаревший кэш
+    responses = iter([httpx.Response(200, json={'Id': 1}, headers={'Cache-Control': 'max-age=0'})])
+
+    def handler(request):
+        return next(responses, httpx.Response(503))
+
+    async def scenario():
+        cache = MemoryCacheBackend()
+        client = make_client(handler, retry=NO_DELAY, cache=cache)
+        first = await client._get('/creations/1', cache_ttl=60)
+        second = await client._get('/creations/1', cache_ttl=60)
+        return first, second, cache.stats['stale']
+
+    assert asyncio.run(scenario()) == ({'Id': 1}, {'Id': 1}, 1)
+
+
+def test_base_client_deadline(monkeypatch, make_client):  # Общий дедлайн ограничивает зависший запрос
+    from app.core.config import settings
+
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={})
+
+    monkeypatch.setattr(settings, 'afisha_request_deadline', 0.01)
+    with pytest.raises(AfishaUnavailableError):
+        asyncio.run(make_client(handler, retry=NO_DELAY)._get('/cities'))
+
+
+def test_read_timeout_below_deadline():  # Таймаут попытки меньше дедлайна, иначе повторов не будет
+    from pydantic import ValidationError
+
+    from app.core.config import Settings, settings
+
+    assert settings.afisha_read_timeout < settings.afisha_request_deadline
+    with pytest.raises(ValidationError):
+        Settings(afisha_read_timeout=10.0, afisha_request_deadline=8.0)
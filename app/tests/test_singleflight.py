@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+
+from app.services.afisha.governor import Priority, UpstreamGovernor
+from app.services.afisha.singleflight import SingleFlight
+
+
+def test_singleflight_coalesces_concurrent_calls():  # Одинаковые вызовы ждут одну работу
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do('k', work) for _ in range(5)))
+        return results, flight.stats, len(flight)
+
+    results, stats, pending = asyncio.run(scenario())
+    assert results == [1] * 5
+    assert stats['leader'] == 1 and stats['coalesced'] == 4
+    assert pending == 0
+
+
+def test_singleflight_cancel_one_waiter():  # Отмена одного ожидающего не отменяет работу для других
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 'ok'
+
+        first = asyncio.create_task(flight.do('k', work))
+        second = asyncio.create_task(flight.do('k', work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(scenario()) == ('ok', True)
+
+
+def test_singleflight_cancel_all_waiters():  # Если ждать некому, работа отменяется
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flight.do('k', work))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+        return cancelled.is_set(), len(flight)
+
+    assert asyncio.run(scenario()) == (True, 0)
+
+
+def test_base_client_coalesces_upstream_calls(make_client):  # Одновременные запросы к одному эндпоинту уходят в Афишу один раз
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={'Id': 1})
+
+    async def scenario():
+        client = make_client(handler)
+        return await asyncio.gather(*(client._get('/creations/1') for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert results == [{'Id': 1}] * 10
+    assert len(calls) == 1
+
+
+def test_base_client_boosts_shared_prefetch(make_client):  # Пользовательский запрос, присоединившийся к фоновому, не ждёт в фоновой очереди
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={'Id': 1})
+
+    async def scenario():
+        governor = UpstreamGovernor(rate=1000, burst=1000, max_concurrency=1, queue_timeout=1)
+        client = make_client(handler, governor=governor)
+        async with governor.slot():
+            prefetch = asyncio.create_task(client._get('/creations/1', priority=Priority.PREFETCH))
+            await asyncio.sleep(0)
+            bulk = asyncio.create_task(client._get('/creations/2', priority=Priority.BULK))
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(client._get('/creations/1'))
+            await asyncio.sleep(0)
+        await asyncio.gather(prefetch, bulk, interactive)
+        return governor.stats['acquired_interactive'], governor.stats['acquired_prefetch']
+
+    assert asyncio.run(scenario()) == (2, 0)
+    assert calls == ['/creations/1', '/creations/2']
+
+
+def test_singleflight_drain():  # Остановка дожидается начатой работы
+    async def scenario():
+        flight = SingleFlight()
+        done = []
+
+        async def work():
+            await asyncio.sleep(0.01)
+            done.append(True)
+
+        waiter = asyncio.ensure_future(flight.do('k', work))
+        await asyncio.sleep(0)
+        await flight.drain(timeout=1)
+        await waiter
+        return done
+
+    assert asyncio.run(scenario()) == [True]
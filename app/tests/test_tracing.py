@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+from app.services.afisha.base import AfishaBaseClient
+from app.services.afisha.resilience import RetryPolicy
+from app.services.afisha.tracing import RequestTrace, SlowRequestLog
+
+NO_RETRY = RetryPolicy(attempts=1, base_delay=0, max_delay=0)
+
+
+def test_request_trace_phases():  # События httpcore складываются в фазы, pool — до первой операции
+    async def scenario():
+        trace = RequestTrace()
+        for event in (
+            'connection.connect_tcp.started',
+            'connection.connect_tcp.complete',
+            'http11.send_request_headers.started',
+            'http11.send_request_headers.complete',
+            'http11.send_request_body.started',
+            'http11.send_request_body.complete',
+            'http11.receive_response_headers.started',
+        ):
+            await trace(event, {})
+        await asyncio.sleep(0.02)
+        await trace('http11.receive_response_headers.complete', {})
+        await trace('http11.response_closed.started', {})
+        return trace.phases
+
+    phases = asyncio.run(scenario())
+    assert set(phases) == {'pool', 'connect', 'send', 'wait'}
+    assert phases['wait'] >= 0.02
+
+
+def test_slow_request_log():  # Только запросы дольше порога, не больше capacity, свежие первыми
+    log = SlowRequestLog(threshold=0.5, capacity=2)
+    log.record('/cities', None, '200', 0.1, 10, {})
+    for n in range(3):
+        log.record(f'/creations/{n}', {'CityId': 2, 'Date': None}, '200', 1.0, 10, {'wait': 0.9})
+    assert [entry['endpoint'] for entry in log.entries()] == ['/creations/2', '/creations/1']
+    assert log.entries()[0]['params'] == {'CityId': 2}
+    assert log.stats['captured'] == 3
+
+
+def test_slow_upstream_captured():  # Медленный ответ реального сокета попадает в журнал с фазами
+    async def handle(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        await asyncio.sleep(0.05)
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 9\r\n\r\n{"Id": 1}')
+        await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        http = httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}')
+        client = AfishaBaseClient(http, retry=NO_RETRY, slow_log=SlowRequestLog(threshold=0.04))
+        data = await client._get('/creations/7', {'CityId': 2})
+        await http.aclose()
+        server.close()
+        return data, client.slow_log.entries()
+
+    data, entries = asyncio.run(scenario())
+    assert data == {'Id': 1}
+    [entry] = entries
+    assert entry['endpoint'] == '/creations/7'
+    assert entry['params'] == {'CityId': 2}
+    assert entry['size'] == 9
+    assert entry['phases']['wait'] >= 0.04
+    assert {'pool', 'connect', 'send', 'body'} <= set(entry['phases'])
+
+
+def test_debug_endpoints_disabled_by_default(monkeypatch):  # /debug/* без настройки не видны
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            hidden = await client.get('/debug/profiler')
+            monkeypatch.setattr(settings, 'debug_endpoints_enabled', True)
+            shown = await client.get('/debug/profiler')
+            toggled = await client.put('/debug/profiler', params={'enabled': 'true'})
+            return hidden, shown, toggled
+
+    hidden, shown, toggled = asyncio.run(scenario())
+    assert hidden.status_code == 404
+    assert shown.status_code == 200
+    assert shown.json()['enabled'] is False
+    # pyinstrument — необязательная зависимость
+    assert toggled.status_code == (200 if shown.json()['available'] else 409)
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from app.services.catalog.whatson import WhatsOnIndex
+
+
+def make_index():
+    index = WhatsOnIndex()
+    index.set_types(2, {1: 'Movie', 2: 'Concert', 3: 'Movie'})
+    index.update_schedule(2, 1, [datetime(2025, 8, 1, 19), datetime(2025, 8, 5, 19)])
+    index.update_schedule(2, 2, [datetime(2025, 8, 2, 20)])
+    index.update_schedule(2, 3, [datetime(2025, 8, 1, 19)])
+    return index
+
+
+def test_whatson_date_window():  # Окно дат [from, to) по времени начала сеансов
+    index = make_index()
+    assert index.query(2, '2025-08-01T00:00:00', '2025-08-02T00:00:00') == {1, 3}
+    assert index.query(2, '2025-08-02T00:00:00', '2025-08-03T00:00:00') == {2}
+    assert index.query(2, date_from='2025-08-03T00:00:00') == {1}
+    assert index.query(2) == {1, 2, 3}
+    assert index.query(3) == set()
+
+
+def test_whatson_type_filter():  # Фильтр по типу произведения
+    index = make_index()
+    assert index.query(2, '2025-08-01T00:00:00', creation_type='Concert') == {2}
+
+
+def test_whatson_incremental_update():  # Новое расписание заменяет старые сеансы произведения
+    index = make_index()
+    index.update_schedule(2, 1, [datetime(2025, 8, 10, 12)])
+    assert index.query(2, '2025-08-01T00:00:00', '2025-08-06T00:00:00') == {2, 3}
+    assert index.query(2, '2025-08-10T00:00:00', '2025-08-11T00:00:00') == {1}
+    index.remove_creations(2, [3])
+    assert index.query(2, '2025-08-01T00:00:00', '2025-08-02T00:00:00') == set()
+
+
+def test_whatson_load_matches_updates():  # Загрузка из снимка эквивалентна пошаговым обновлениям
+    index = make_index()
+    loaded = WhatsOnIndex()
+    loaded.load(2, [(1, '2025-08-05T19:00:00'), (2, '2025-08-02T20:00:00'), (1, '2025-08-01T19:00:00'), (3, '2025-08-01T19:00:00')])
+    loaded.set_types(2, {1: 'Movie', 2: 'Concert', 3: 'Movie'})
+    for window in [('2025-08-01', '2025-08-02'), ('2025-08-02', '2025-08-06'), (None, None)]:
+        assert loaded.query(2, *window) == index.query(2, *window)
+    loaded.update_schedule(2, 1, [])
+    assert loaded.query(2) == {2, 3}
@@ -0,0 +1,89 @@
+import difflib
+from bisect import bisect_left
+from typing import Any, Iterable, Optional
+
+# Упрощённая транслитерация для поиска по латинскому написанию ('Moskva' -> 'Москва')
+TRANSLIT_TABLE = str.maketrans(
+    {
+        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+        'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+        'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+        'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+        'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    }
+)
+
+
+def normalize_city_name(name: str) -> str:
+    # Регистр, ё/е, дефисы и лишние пробелы не влияют на поиск
+    name = name.casefold().replace('ё', 'е').replace('-', ' ')
+    return ' '.join(name.split())
+
+
+class CityIndex:
+    """
+    Индекс справочника городов: строится один раз на снимок `/cities`
+    и даёт поиск ID по нормализованному имени за O(1), а также поиск по префиксу
+    и нечёткий поиск для автодополнения.
+    """
+
+    def __init__(self, cities: Iterable[dict], translit_table: Optional[dict] = TRANSLIT_TABLE):
+        self._translit_table = translit_table
+        self._by_key: dict[str, dict] = {}
+
+        for city in cities:
+            name = city.get('Name')
+            if not name:
+                continue
+            for key in self._keys(name):
+                self._by_key.setdefault(key, city)
+
+        self._sorted_keys = sorted(self._by_key)
+
+    @classmethod
+    def from_payload(cls, cities: Any, **kwargs) -> 'CityIndex':
+        if isinstance(cities, CityIndex):
+            return cities
+        cities = cities.get('Cities', []) if isinstance(cities, dict) else cities
+        return cls(cities or [], **kwargs)
+
+    def _keys(self, name: str) -> set[str]:
+        key = normalize_city_name(name)
+        keys = {key}
+        if self._translit_table is not None:
+            keys.add(key.translate(self._translit_table))
+        return keys
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def get(self, city_name: str) -> Optional[dict]:
+        for key in self._keys(city_name):
+            city = self._by_key.get(key)
+            if city is not None:
+                return city
+        return None
+
+    def get_id(self, city_name: str) -> Optional[int]:
+        city = self.get(city_name)
+        return city['Id'] if city else None
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> list[dict]:
+        found: dict[Any, dict] = {}
+
+        for prefix in sorted(self._keys(query)):
+            if not prefix:
+                continue
+            pos = bisect_left(self._sorted_keys, prefix)
+            while pos < len(self._sorted_keys) and self._sorted_keys[pos].startswith(prefix):
+                city = self._by_key[self._sorted_keys[pos]]
+                found.setdefault(city['Id'], city)
+                pos += 1
+
+        if fuzzy and len(found) < limit:
+            for key in self._keys(query):
+                for match in difflib.get_close_matches(key, self._sorted_keys, n=limit, cutoff=0.7):
+                    city = self._by_key[match]
+                    found.setdefault(city['Id'], city)
+
+        return list(found.values())[:limit]
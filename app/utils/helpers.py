@@ -1,28 +1,52 @@
 from datetime import date, datetime, time, timedelta
-from typing import Optional, Any, Union
+from functools import lru_cache
+from logging import Logger
+from typing import AsyncIterator, Iterable, Mapping, Optional, Any, Union
 
 from pydantic import BaseModel
 
-
-def _get_city_id(city_name: str, cities: dict):
-    cities = cities.get('Cities', []) if isinstance(cities, dict) else cities
-
+from app.schemas.cities import CitiesFilter, CitiesRequest
+from app.schemas.creations import (
+    CreationFilter,
+    CreationItem,
+    CreationScheduleFilter,
+    CreationScheduleRequest,
+    CreationsRequest,
+    CreationStreamFilter,
+    CreationsPage,
+    UpstreamCreationsPage,
+    creation_item_adapter,
+    creations_page_adapter,
+    upstream_creations_page_adapter,
+)
+from app.utils.city_index import CityIndex
+from app.utils.metrics import timing
+
+
+def _get_city_id(city_name: str, cities: Union[dict, list, CityIndex]):
+    # Готовый индекс — поиск за O(1) с нормализацией имени. Сырой ответ `/cities`
+    # просматривается линейно по точному имени: строить индекс ради одного поиска дороже
+    if isinstance(cities, CityIndex):
+        return cities.get_id(city_name)
+    cities = (cities.get('Cities') if isinstance(cities, dict) else cities) or []
     for city in cities:
-        if city['Name'] == city_name:
+        if city.get('Name') == city_name:
             return city['Id']
     return None
 
 
+def _to_date(value: Union[date, str, None]) -> Optional[date]:
+    if not value:
+        return None
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
 def _convert_dates(
     date_from: Optional[date] | Optional[str], date_to: Optional[date] | Optional[str]
 ) -> tuple[Optional[datetime], Optional[datetime]]:
-    def to_datetime(d):
-        if isinstance(d, str):
-            d = datetime.strptime(d, '%Y-%m-%d').date()
-        return datetime.combine(d, time.min) if d else None
-
-    date_from_dt = to_datetime(date_from)
-    date_to_dt = to_datetime(date_to)
+    date_from, date_to = _to_date(date_from), _to_date(date_to)
+    date_from_dt = datetime.combine(date_from, time.min) if date_from else None
+    date_to_dt = datetime.combine(date_to, time.min) if date_to else None
 
     if date_from_dt and date_to_dt and date_from_dt == date_to_dt:
         date_to_dt += timedelta(days=1)
@@ -35,78 +59,126 @@ def _to_camel_case(snake: str) -> str:
     return ''.join(p.capitalize() for p in parts)
 
 
+class ParamsTranslation:
+    """
+    Заранее вычисленное соответствие полей фильтра параметрам Афиши для пары схем.
+    Город разрешается отдельно (справочник меняется), остальное зависит только от значений
+    и кэшируется по нормализованному кортежу параметров.
+    """
+
+    CITY_FIELDS = ('city_name', 'city_id')
+
+    def __init__(self, fields: Iterable[str], targets: Optional[Iterable[str]] = None):
+        allowed = set(targets) if targets is not None else None
+        fields = [f for f in fields if f not in self.CITY_FIELDS]
+
+        def target(field: str) -> Optional[str]:
+            name = _to_camel_case(field)
+            return name if allowed is None or name in allowed else None
+
+        # Пары дат: *_from / *_to -> *From / *To
+        self.date_pairs = [
+            (f, f'{f[:-5]}_to', target(f), target(f'{f[:-5]}_to'))
+            for f in fields
+            if f.endswith('_from') and f'{f[:-5]}_to' in fields
+        ]
+        dated = {f for pair in self.date_pairs for f in pair[:2]}
+        self.passthrough = {f: target(f) for f in fields if f not in dated and target(f)}
+        self.fields = (*self.CITY_FIELDS, *fields)
+
+    def normalize(self, params: Union[dict[str, Any], BaseModel]) -> tuple:
+        # Без None и незаполненных шаблонов '${...}'; порядок — порядок полей схемы
+        get = params.get if isinstance(params, dict) else params.__dict__.get
+        return tuple(
+            (field, value)
+            for field in self.fields
+            if (value := get(field)) is not None
+            and not (isinstance(value, str) and value.startswith('${'))
+        )
+
+    def translate(self, items: tuple) -> tuple:
+        values = dict(items)
+        out = []
+        for from_field, to_field, from_key, to_key in self.date_pairs:
+            if values.get(from_field) or values.get(to_field):
+                date_from, date_to = _convert_dates(values.get(from_field), values.get(to_field))
+                if date_from and from_key:
+                    out.append((from_key, date_from.isoformat()))
+                if date_to and to_key:
+                    out.append((to_key, date_to.isoformat()))
+        for field, key in self.passthrough.items():
+            if field in values:
+                out.append((key, values[field]))
+        return tuple(out)
+
+
+@lru_cache(maxsize=4096)
+def _translate_cached(translation: ParamsTranslation, items: tuple) -> tuple:
+    return translation.translate(items)
+
+
+_TRANSLATIONS = {
+    CreationFilter: ParamsTranslation(CreationFilter.model_fields, CreationsRequest.model_fields),
+    CreationStreamFilter: ParamsTranslation(
+        CreationStreamFilter.model_fields, CreationsRequest.model_fields
+    ),
+    CreationScheduleFilter: ParamsTranslation(
+        CreationScheduleFilter.model_fields, CreationScheduleRequest.model_fields
+    ),
+    CitiesFilter: ParamsTranslation(CitiesFilter.model_fields, CitiesRequest.model_fields),
+}
+# Для dict без схемы: все известные поля фильтров
+_DEFAULT_TRANSLATION = ParamsTranslation(
+    dict.fromkeys(field for model in _TRANSLATIONS for field in model.model_fields)
+)
+
+
 def transform_params(
-    params: Union[dict[str, Any], BaseModel], cities: Optional[dict] = None
+    params: Union[dict[str, Any], BaseModel], cities: Optional[Union[dict, CityIndex]] = None
 ) -> dict[str, Any]:
     """
     Преобразует входные параметры запроса в формат, необходимый для API Афиши.
     Принимает как dict, так и Pydantic-модель.
+    Города передаются готовым CityIndex или сырым ответом `/cities`.
     """
+    translation = _TRANSLATIONS.get(type(params), _DEFAULT_TRANSLATION)
+    items = translation.normalize(params)
+    values = dict(items)
 
     out_params = {}
 
-    # Приводим к dict
-    if isinstance(params, BaseModel):
-        params_dict = params.model_dump(exclude_none=True)
-    else:
-        params_dict = {k: v for k, v in params.items() if v is not None}
-
-    params = {
-        k: v for k, v in params_dict.items() if not (isinstance(v, str) and v.startswith('${'))
-    }
-
     # Обработка города
-    city_name = params.get('city_name')
-    city_id = params.get('city_id')
+    city_name = values.get('city_name')
+    city_id = values.get('city_id')
 
     if cities and city_name:
-        out_params['CityId'] = _get_city_id(city_name, cities)
+        with timing('city'):
+            out_params['CityId'] = _get_city_id(city_name, cities)
     elif city_id:
         out_params['CityId'] = city_id
 
-    # Обработка дат
-    date_from_raw = params.get('date_from')
-    date_to_raw = params.get('date_to')
-    if date_from_raw or date_to_raw:
-        date_from, date_to = _convert_dates(date_from_raw, date_to_raw)
+    # Даты и остальные поля зависят только от значений — повторные запросы берутся из кэша
+    try:
+        translated = _translate_cached(translation, items)
+    except TypeError:  # Нехешируемые значения в dict
+        translated = translation.translate(items)
+    out_params.update(translated)
+    return out_params
 
-        if date_from:
-            out_params['DateFrom'] = date_from.isoformat()
-        if date_to:
-            out_params['DateTo'] = date_to.isoformat()
 
-    # Преобразование остальных параметров
-    # keys_afisha = ['CityId', 'DateFrom', 'DateTo', 'CreationType', 'Limit', 'Cursor', 'CinemaFormatDateFrom', 'CinemaFormatDateTo']
-    passthrough_keys = ['creation_type', 'limit', 'cursor']  # Прочие поля
-    for key in passthrough_keys:
-        if key in params:
-            out_params[_to_camel_case(key)] = params[key]
+def params_key(params: Optional[Mapping[str, Any]]) -> tuple[tuple[str, str], ...]:
+    """Каноничный хешируемый ключ параметров Афиши: порядок и None-значения не важны."""
+    return tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
 
-    return out_params
+
+CREATION_KEYS = tuple(CreationItem.__annotations__)
 
 
 def clean_creations(creations):
     elements = creations['Creations']
 
-    need_keys = [
-        'Id',
-        'Type',
-        'Name',
-        'Genres',
-        'Description',
-        'Rating',
-        'ReleaseDate',
-        'AgeRestriction',
-        'Country',
-        'AfishaId',
-        'AfishaCreationUrl',
-    ]
-
-    filtered = []
-    for element in elements:
-        filtered_element = {k: element[k] for k in need_keys if k in element}
-        filtered.append(filtered_element)
-    
+    filtered = [{k: element[k] for k in CREATION_KEYS if k in element} for element in elements]
+
     return {
         'items': filtered,
         'pagination': {
@@ -115,3 +187,60 @@ def clean_creations(creations):
             'total_count': len(filtered)
         }
     }
+
+
+def clean_creations_json(raw: bytes) -> bytes:
+    """
+    Быстрый путь для `/creations/page`: сырой ответ Афиши -> готовое тело ответа.
+    Ненужные поля отбрасываются ещё при разборе, сериализация идёт в pydantic-core.
+    """
+    with timing('transform'):
+        upstream = upstream_creations_page_adapter.validate_json(raw)
+        items = upstream.get('Creations') or []
+        page: CreationsPage = {
+            'items': items,
+            'pagination': {
+                'has_more': upstream.get('HasMore', False),
+                'next_cursor': upstream.get('NextCursor'),
+                'total_count': len(items),
+            },
+        }
+    with timing('serialize'):
+        return creations_page_adapter.dump_json(page)
+
+
+def session_times(schedule: Any) -> list[datetime]:
+    """Время начала сеансов из ответа расписания Афиши по местному времени площадки."""
+    times = []
+    items = schedule.get('Schedule') if isinstance(schedule, dict) else None
+    for item in items if isinstance(items, list) else []:
+        sessions = item.get('Sessions') if isinstance(item, dict) else None
+        for session in sessions if isinstance(sessions, list) else []:
+            try:
+                # Смещение отбрасывается: сравниваем с фильтрами в местном времени
+                times.append(datetime.fromisoformat(session['DateTime']).replace(tzinfo=None))
+            except (KeyError, TypeError, ValueError):
+                continue
+    return times
+
+
+async def creations_ndjson(
+    first_page: UpstreamCreationsPage, pages: AsyncIterator[UpstreamCreationsPage], logger: Logger
+) -> AsyncIterator[bytes]:
+    """
+    Тело ответа `/creations/stream`: по строке JSON на произведение, один чанк на страницу.
+    Ошибка посреди потока уже не может сменить статус ответа, поэтому поток
+    завершается строкой {"error": ...}.
+    """
+    try:
+        page = first_page
+        while page is not None:
+            items = page.get('Creations')
+            if items:
+                yield b''.join(creation_item_adapter.dump_json(item) + b'\n' for item in items)
+            page = await anext(pages, None)
+    except Exception:
+        logger.error('Ошибка при выгрузке списка произведений', exc_info=True)
+        yield b'{"error":"upstream_failed"}\n'
+    finally:
+        await pages.aclose()
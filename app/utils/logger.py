@@ -1,11 +1,176 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from app.core.config import settings
+
+# ID текущего запроса; выставляется RequestIdMiddleware
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+TEXT_FORMAT = '[%(asctime)s] [%(levelname)s] [%(name)s] [%(request_id)s] %(message)s'
+
+
+class RequestIdFilter(logging.Filter):
+    # Работает на стороне вызывающего: в потоке слушателя контекста запроса уже нет
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or '-'
+        return True
+
+
+class ErrorBurstSampler(logging.Filter):
+    """
+    Прореживание всплесков предупреждений и ошибок: с одного места в коде за окно
+    `window` секунд проходит не больше `burst` записей. Первая запись следующего окна
+    несёт поле `suppressed` — сколько было отброшено.
+    """
+
+    def __init__(self, burst: int = 20, window: float = 10.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._lock = threading.Lock()
+        # Место вызова -> [начало окна, пропущено в окне, отброшено в окне]
+        self._windows: dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                if state is not None and state[2]:
+                    record.suppressed = state[2]
+                self._windows[key] = [now, 1, 0]
+                return True
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        if getattr(record, 'suppressed', None):
+            entry['suppressed'] = record.suppressed
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, 'request_id'):
+            record.request_id = '-'
+        text = super().format(record)
+        if getattr(record, 'suppressed', None):
+            text += f' (пропущено похожих: {record.suppressed})'
+        return text
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Кладёт запись в очередь и сразу возвращает управление; форматирование,
+    включая трейсбеки, и запись в поток/файл выполняет поток QueueListener.
+    При переполненной очереди запись отбрасывается, а не блокирует event loop.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Стандартный prepare форматирует трейсбек здесь же; нам нужно только
+        # подставить аргументы, а exc_info передать слушателю как есть
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            AsyncQueueHandler.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[AsyncQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def log_file_path() -> str:
+    # Ротация одного файла из нескольких процессов теряет записи: у каждого воркера свой файл
+    if settings.workers <= 1:
+        return settings.log_file
+    root, ext = os.path.splitext(settings.log_file)
+    return f'{root}.{os.getpid()}{ext}'
+
+
+def _build_output_handlers() -> list[logging.Handler]:
+    formatter = JsonFormatter() if settings.log_format == 'json' else TextFormatter(TEXT_FORMAT)
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    if settings.log_file:
+        handlers.append(
+            RotatingFileHandler(
+                log_file_path(),
+                maxBytes=settings.log_file_max_bytes,
+                backupCount=settings.log_file_backups,
+                encoding='utf-8',
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging() -> AsyncQueueHandler:
+    """Один QueueHandler на процесс и поток-слушатель, который пишет в stderr и файл."""
+    global _listener, _handler
+    with _setup_lock:
+        if _handler is None:
+            log_queue = queue.Queue(maxsize=settings.log_queue_size)
+            _handler = AsyncQueueHandler(log_queue)
+            _handler.addFilter(RequestIdFilter())
+            _handler.addFilter(
+                ErrorBurstSampler(settings.log_error_burst, settings.log_error_window)
+            )
+            _listener = QueueListener(
+                log_queue, *_build_output_handlers(), respect_handler_level=True
+            )
+            _listener.start()
+            atexit.register(shutdown_logging)
+    return _handler
+
+
+def shutdown_logging():
+    # Дописывает всё, что осталось в очереди
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 def get_logger(name: str):
     logger = logging.getLogger(name)
     if not logger.hasHandlers():
-        formatter = logging.Formatter('[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
-        logger.setLevel(logging.INFO)
+        logger.addHandler(setup_logging())
+        logger.setLevel(settings.log_level.upper())
+        logger.propagate = False
     return logger
@@ -0,0 +1,172 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Сэмпл метрики: (имя, метки, значение)
+Sample = tuple[str, dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def _key(self, labels: dict[str, str]) -> tuple:
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for key, value in self._values.items():
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Счётчики по корзинам (последняя — +Inf), сумма
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for key, (counts, total) in self._values.items():
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{self.name}_bucket', {**labels, 'le': le}, cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Registry:
+    """Реестр метрик процесса; отдаётся в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self, extra: Iterable[Metric] = ()) -> str:
+        # extra — метрики, снятые со статистики компонентов в момент запроса
+        lines = []
+        for metric in (*self._metrics.values(), *extra):
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Время обработки запроса', ('route', 'method', 'status')
+)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    'http_response_size_bytes', 'Размер тела ответа', ('route',), buckets=SIZE_BUCKETS
+)
+UPSTREAM_DURATION = REGISTRY.histogram(
+    'afisha_upstream_duration_seconds', 'Время запроса к API Афиши', ('endpoint', 'status')
+)
+UPSTREAM_PHASE_DURATION = REGISTRY.histogram(
+    'afisha_upstream_phase_seconds',
+    'Фазы запроса к API Афиши: pool, connect, tls, send, wait, body',
+    ('endpoint', 'phase'),
+)
+UPSTREAM_RESPONSE_SIZE = REGISTRY.histogram(
+    'afisha_upstream_response_size_bytes',
+    'Размер ответа API Афиши',
+    ('endpoint',),
+    buckets=SIZE_BUCKETS,
+)
+
+
+# --- Разбивка времени запроса по фазам для Server-Timing ---
+
+_timings: ContextVar[Optional[dict[str, float]]] = ContextVar('timings', default=None)
+
+
+def start_timings() -> dict[str, float]:
+    timings: dict[str, float] = {}
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def timing(phase: str):
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - started
+
+
+def server_timing_header(timings: dict[str, float], total: float) -> str:
+    phases = [f'{phase};dur={seconds * 1000:.1f}' for phase, seconds in timings.items()]
+    phases.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(phases)
@@ -0,0 +1,67 @@
+import importlib.util
+import random
+import time
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Profiler:
+    """
+    Выборочное профилирование обработки запросов через pyinstrument (сэмплирующий,
+    понимает async). Включается настройкой или на лету через /debug/profiler;
+    без пакета pyinstrument не включается. Последние профили хранятся в памяти процесса.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.profiler_enabled,
+        sample_rate: float = settings.profiler_sample_rate,
+        interval: float = settings.profiler_interval,
+        capacity: int = settings.profiler_capacity,
+    ):
+        self.available = importlib.util.find_spec('pyinstrument') is not None
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.profiles: deque[dict] = deque(maxlen=capacity)
+        self.enabled = False
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled: bool) -> bool:
+        if enabled and not self.available:
+            logger.warning('Профилировщик не включён: не установлен пакет pyinstrument')
+            enabled = False
+        self.enabled = enabled
+        return enabled
+
+    def should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def start(self):
+        from pyinstrument import Profiler as SamplingProfiler
+
+        profiler = SamplingProfiler(interval=self.interval, async_mode='enabled')
+        profiler.start()
+        return profiler
+
+    def finish(self, profiler, route: str, duration: float, request_id: Optional[str]):
+        profiler.stop()
+        self.profiles.append(
+            {
+                'at': time.time(),
+                'route': route,
+                'duration': round(duration, 4),
+                'request_id': request_id,
+                'profile': profiler.output_text(unicode=True, color=False),
+            }
+        )
+
+    def entries(self) -> list[dict]:
+        return list(reversed(self.profiles))
+
+
+PROFILER = Profiler()
@@ -0,0 +1,10 @@
+"""
+Бенчмарки и нагрузочный прогон. Микробенчмарки импортируют `app`, а его настройки
+требуют ключей Афиши; сами бенчмарки в Афишу не ходят, поэтому без заданных
+переменных окружения подставляются заглушки, а лог пишется только в stderr.
+"""
+import os
+
+os.environ.setdefault('AFISHA_API_KEY', 'bench')
+os.environ.setdefault('AFISHA_WIDGET_KEY', 'bench')
+os.environ.setdefault('LOG_FILE', '')
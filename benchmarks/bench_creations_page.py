@@ -0,0 +1,63 @@
+"""
+CPU и пиковая память на запрос `/creations/page`: старый путь
+(json + clean_creations + jsonable_encoder) против быстрого (clean_creations_json).
+
+    python -m benchmarks.bench_creations_page --size 100 --rounds 200
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from app.utils.helpers import clean_creations, clean_creations_json
+from benchmarks.payloads import make_creations_page
+
+
+def baseline(raw: bytes) -> bytes:
+    # Так отвечал роутер раньше: response.json() -> clean_creations -> JSONResponse
+    content = jsonable_encoder(clean_creations(json.loads(raw)))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()
+
+
+def measure(fn, raw: bytes, rounds: int) -> float:
+    fn(raw)
+    started = time.process_time()
+    for _ in range(rounds):
+        fn(raw)
+    return (time.process_time() - started) / rounds * 1e6
+
+
+def peak_memory(fn, raw: bytes) -> float:
+    tracemalloc.start()
+    fn(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, nargs='+', default=[20, 100, 500])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f'{"items":>6} {"payload KiB":>12} {"before, µs":>12} {"after, µs":>12} {"speedup":>8}'
+        f' {"before, KiB":>12} {"after, KiB":>12}'
+    )
+    for size in args.size:
+        raw = json.dumps(make_creations_page(size), ensure_ascii=False).encode()
+        assert json.loads(baseline(raw)) == json.loads(clean_creations_json(raw))
+        before = measure(baseline, raw, args.rounds)
+        after = measure(clean_creations_json, raw, args.rounds)
+        print(
+            f'{size:>6} {len(raw) / 1024:>12.0f} {before:>12.0f} {after:>12.0f}'
+            f' {before / after:>7.1f}x {peak_memory(baseline, raw):>12.0f}'
+            f' {peak_memory(clean_creations_json, raw):>12.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
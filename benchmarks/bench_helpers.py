@@ -0,0 +1,67 @@
+"""
+Микробенчмарки горячих функций обработки запроса на реалистичных данных:
+transform_params, _get_city_id и clean_creations / clean_creations_json.
+
+    python -m benchmarks.bench_helpers --rounds 2000
+"""
+import argparse
+import json
+import timeit
+
+from app.utils.city_index import CityIndex
+from app.utils.helpers import (
+    _get_city_id,
+    clean_creations,
+    clean_creations_json,
+    transform_params,
+)
+from benchmarks.payloads import make_cities, make_creations_page
+
+
+def best_of(fn, rounds: int, repeat: int = 5) -> float:
+    # Лучший из нескольких прогонов меньше всего зависит от соседних процессов
+    return min(timeit.repeat(fn, number=rounds, repeat=repeat)) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--cities', type=int, default=600)
+    parser.add_argument('--size', type=int, nargs='+', default=[100, 500])
+    args = parser.parse_args()
+
+    cities = make_cities(args.cities)
+    index = CityIndex.from_payload(cities)
+    params = {
+        'city_name': 'Ростов-на-Дону',
+        'date_from': '2025-08-01',
+        'date_to': '2025-08-15',
+        'creation_type': 'Movie',
+        'limit': 20,
+    }
+
+    city_name = params['city_name']
+    cases = [
+        ('_get_city_id, сырой /cities', lambda: _get_city_id(city_name, cities), args.rounds),
+        ('_get_city_id, CityIndex', lambda: _get_city_id(city_name, index), args.rounds),
+        ('transform_params, сырой /cities', lambda: transform_params(params, cities), args.rounds),
+        ('transform_params, CityIndex', lambda: transform_params(params, index), args.rounds),
+        ('transform_params, без города', lambda: transform_params({'limit': 20}), args.rounds),
+    ]
+    for size in args.size:
+        page = make_creations_page(size)
+        raw = json.dumps(page, ensure_ascii=False).encode()
+        rounds = max(1, args.rounds // size)
+        # dict -> dict без разбора и сериализации против полного пути bytes -> bytes
+        cases.append((f'clean_creations, {size} шт.', lambda p=page: clean_creations(p), rounds))
+        cases.append(
+            (f'clean_creations_json, {size} шт.', lambda r=raw: clean_creations_json(r), rounds)
+        )
+
+    print(f'{"случай":<40} {"µs/вызов":>12}')
+    for name, fn, rounds in cases:
+        print(f'{name:<40} {best_of(fn, rounds):>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Локальная заглушка API Афиши для нагрузочных прогонов: те же эндпоинты и форма ответов,
+настраиваемая задержка и доля ошибок.
+
+    python -m benchmarks.fake_afisha --port 9100 --latency 0.05 --jitter 0.02 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from fastapi import FastAPI, Response
+
+from benchmarks.payloads import make_cities, make_creation, make_schedule
+
+
+def create_app(
+    latency: float = 0.05,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    page_size: int = 100,
+    pages: int = 5,
+    seed: int = 1,
+) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+    creations = [make_creation(i, random.Random(seed + i)) for i in range(page_size * pages)]
+    by_id = {c['Id']: json.dumps(c, ensure_ascii=False).encode() for c in creations}
+    cities = json.dumps(make_cities(), ensure_ascii=False).encode()
+
+    async def respond(content: bytes) -> Response:
+        await asyncio.sleep(max(0.0, rng.gauss(latency, jitter) if jitter else latency))
+        if error_rate and rng.random() < error_rate:
+            return Response(status_code=rng.choice([500, 502, 503]))
+        return Response(content=content, media_type='application/json')
+
+    @app.head('/v3/')
+    async def root():
+        return Response()
+
+    @app.get('/v3/cities')
+    async def get_cities():
+        return await respond(cities)
+
+    @app.get('/v3/cities/{city_id}')
+    async def get_city(city_id: int):
+        return await respond(json.dumps({'Id': city_id, 'Name': f'Город {city_id}'}).encode())
+
+    @app.get('/v3/creations/page')
+    async def get_page(Cursor: str = None, Limit: int = page_size):
+        start = int(Cursor) if Cursor else 0
+        items = creations[start:start + Limit]
+        has_more = start + Limit < len(creations)
+        page = {
+            'Creations': items,
+            'HasMore': has_more,
+            'NextCursor': str(start + Limit) if has_more else None,
+        }
+        return await respond(json.dumps(page, ensure_ascii=False).encode())
+
+    @app.get('/v3/creations/{id}')
+    async def get_creation(id: int):
+        content = by_id.get(id)
+        if content is None:
+            return Response(status_code=404)
+        return await respond(content)
+
+    @app.get('/v3/creations/kinoplan/{id}')
+    async def get_creation_kinoplan(id: int):
+        return await respond(by_id.get(100000 + id % len(by_id)))
+
+    @app.get('/v3/creations/{id}/schedule')
+    async def get_schedule(id: int):
+        return await respond(json.dumps(make_schedule(id), ensure_ascii=False).encode())
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.05, help='Средняя задержка, с')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Разброс задержки, с')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 5xx')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--pages', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.error_rate, args.page_size, args.pages)
+    uvicorn.run(app, host='127.0.0.1', port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
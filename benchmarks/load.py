@@ -0,0 +1,198 @@
+"""
+Нагрузочный прогон сервиса против локальной заглушки Афиши: поднимает заглушку
+и приложение (uvicorn) отдельными процессами, гоняет смесь маршрутов заданное время
+и печатает p50/p99 и RPS по каждому маршруту.
+
+    python -m benchmarks.load --concurrency 50 --duration 20 --latency 0.05 --error-rate 0.01
+
+Ограничитель запросов к Афише работает и здесь; чтобы мерить сам сервис, его лимиты
+поднимаются через --env AFISHA_RATE_LIMIT=1000 --env AFISHA_RATE_BURST=1000.
+С --target нагрузка идёт на уже запущенный сервис, процессы не поднимаются.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+import httpx
+
+# Шаблон маршрута для отчёта, генератор пути, вес в смеси
+ROUTES = [
+    ('/cities', lambda rng: '/cities', 1),
+    ('/cities/search', lambda rng: f'/cities/search?q={rng.choice(["Мос", "Сан", "Ека"])}', 2),
+    (
+        '/creations/page',
+        lambda rng: '/creations/page?city_name=Москва&limit=20&creation_type=Movie',
+        4,
+    ),
+    ('/creation/{id}', lambda rng: f'/creation/{100000 + rng.randrange(500)}', 6),
+    (
+        '/creation/{id}/schedule',
+        lambda rng: f'/creation/{100000 + rng.randrange(500)}/schedule?city_id=2',
+        4,
+    ),
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run_load(
+    target: str, concurrency: int, duration: float, seed: int = 1
+) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    weights = [weight for _, _, weight in ROUTES]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=target, limits=limits, timeout=30) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker(n: int):
+            rng = random.Random(seed + n)
+            while time.monotonic() < deadline:
+                route, make_path, _ = rng.choices(ROUTES, weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = await client.get(make_path(rng))
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies[route].append(time.perf_counter() - started)
+                if not ok:
+                    errors[route] += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        return latencies, errors, time.monotonic() - started
+
+
+def report(latencies: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> list:
+    rows = []
+    for route, _, _ in ROUTES:
+        values = latencies.get(route, [])
+        rows.append(
+            {
+                'route': route,
+                'requests': len(values),
+                'errors': errors.get(route, 0),
+                'rps': len(values) / elapsed,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+            }
+        )
+    return rows
+
+
+def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{url} не поднялся за {timeout} с')
+
+
+@contextmanager
+def spawn(args: list[str], env: Optional[dict] = None):
+    process = subprocess.Popen([sys.executable, *args], env={**os.environ, **(env or {})})
+    try:
+        yield process
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@contextmanager
+def local_stack(args):
+    afisha_url = f'http://127.0.0.1:{args.afisha_port}'
+    fake = [
+        '-m', 'benchmarks.fake_afisha',
+        '--port', str(args.afisha_port),
+        '--latency', str(args.latency),
+        '--jitter', str(args.jitter),
+        '--error-rate', str(args.error_rate),
+    ]
+    # Снимки и файлы кэша прогона не должны попадать в рабочую копию
+    workdir = tempfile.TemporaryDirectory(prefix='afisha-load-')
+    env = {
+        'AFISHA_BASE_URL': f'{afisha_url}/v3',
+        'AFISHA_API_KEY': os.environ.get('AFISHA_API_KEY', 'load-test'),
+        'AFISHA_WIDGET_KEY': os.environ.get('AFISHA_WIDGET_KEY', 'load-test'),
+        'LOG_FILE': '',
+        'LOG_LEVEL': 'WARNING',
+        'CITIES_SNAPSHOT_PATH': '',
+        'CACHE_SQLITE_PATH': os.path.join(workdir.name, 'afisha_cache.sqlite3'),
+        'CATALOG_PATH': os.path.join(workdir.name, 'catalog.sqlite3'),
+        **dict(item.split('=', 1) for item in args.env),
+    }
+    server = [
+        '-m', 'uvicorn', 'app.main:app',
+        '--host', '127.0.0.1',
+        '--port', str(args.app_port),
+        '--log-level', 'warning',
+        '--no-access-log',
+    ]
+    with workdir, spawn(fake):
+        wait_ready(f'{afisha_url}/v3/cities')
+        with spawn(server, env):
+            target = f'http://127.0.0.1:{args.app_port}'
+            wait_ready(f'{target}/docs')
+            yield target
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target', help='Адрес уже запущенного сервиса')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--app-port', type=int, default=9000)
+    parser.add_argument('--afisha-port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument(
+        '--env',
+        action='append',
+        default=[],
+        metavar='KEY=VALUE',
+        help='Настройки сервиса на прогон, например AFISHA_RATE_LIMIT=200',
+    )
+    parser.add_argument('--json', action='store_true', help='Отчёт в JSON для сравнения прогонов')
+    args = parser.parse_args()
+
+    if args.target:
+        results = asyncio.run(run_load(args.target, args.concurrency, args.duration))
+    else:
+        with local_stack(args) as target:
+            results = asyncio.run(run_load(target, args.concurrency, args.duration))
+    rows = report(*results)
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    print(f'{"маршрут":<26} {"запросов":>9} {"ошибок":>7} {"RPS":>8} {"p50, мс":>9} {"p99, мс":>9}')
+    for row in rows:
+        print(
+            f'{row["route"]:<26} {row["requests"]:>9} {row["errors"]:>7} {row["rps"]:>8.1f}'
+            f' {row["p50_ms"]:>9.1f} {row["p99_ms"]:>9.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Генераторы реалистичных ответов API Афиши для бенчмарков."""
+import random
+
+CREATION_TYPES = ['Movie', 'Concert', 'Performance', 'Exhibition', 'Show']
+GENRES = ['Драма', 'Комедия', 'Триллер', 'Мюзикл', 'Классика', 'Рок', 'Джаз', 'Детям']
+
+
+def make_creation(i: int, rng: random.Random) -> dict:
+    # Помимо полей, которые мы отдаём клиентам, в ответе Афиши много тяжёлых вложенных данных
+    return {
+        'Id': 100000 + i,
+        'Type': rng.choice(CREATION_TYPES),
+        'Name': f'Произведение №{i}',
+        'OriginalName': f'Creation {i}',
+        'Genres': rng.sample(GENRES, 3),
+        'Description': 'Подробное описание произведения. ' * rng.randint(5, 20),
+        'Rating': round(rng.uniform(1, 10), 1),
+        'ReleaseDate': f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00',
+        'AgeRestriction': rng.choice(['0+', '6+', '12+', '16+', '18+']),
+        'Country': rng.choice(['Россия', 'США', 'Франция']),
+        'AfishaId': f'{i:024x}',
+        'AfishaCreationUrl': f'https://www.afisha.ru/movie/creation-{i}/',
+        'Images': [
+            {'Url': f'https://img.afisha.ru/{i}/{n}.jpg', 'Width': 1920, 'Height': 1080}
+            for n in range(8)
+        ],
+        'Persons': [
+            {'Id': rng.randint(1, 10**6), 'Name': f'Персона {n}', 'Role': 'Актёр'}
+            for n in range(15)
+        ],
+        'Trailers': [{'Url': f'https://video.afisha.ru/{i}/{n}.mp4'} for n in range(3)],
+    }
+
+
+def make_creations_page(size: int = 100, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    return {
+        'Creations': [make_creation(i, rng) for i in range(size)],
+        'HasMore': True,
+        'NextCursor': 'c' * 40,
+    }
+
+
+CITY_NAMES = [
+    'Москва', 'Санкт-Петербург', 'Екатеринбург', 'Новосибирск', 'Казань', 'Нижний Новгород',
+    'Ростов-на-Дону', 'Самара', 'Омск', 'Челябинск', 'Уфа', 'Красноярск', 'Пермь', 'Воронеж',
+    'Волгоград', 'Краснодар', 'Орёл', 'Тверь', 'Ярославль', 'Сочи',
+]
+
+
+def make_cities(count: int = 600) -> dict:
+    # Реальный справочник — несколько сотен городов; имена сверх списка выдуманные
+    names = CITY_NAMES + [f'Город {i}' for i in range(count - len(CITY_NAMES))]
+    return {'Cities': [{'Id': i + 2, 'Name': name} for i, name in enumerate(names[:count])]}
+
+
+def make_schedule(creation_id: int, places: int = 10, sessions: int = 8, seed: int = 1) -> dict:
+    rng = random.Random(seed + creation_id)
+    return {
+        'Schedule': [
+            {
+                'Place': {'Id': p, 'Name': f'Площадка {p}', 'Address': f'ул. Тестовая, {p}'},
+                'Sessions': [
+                    {
+                        'Id': p * 1000 + s,
+                        'DateTime': f'2025-08-{rng.randint(1, 28):02d}T{rng.randint(10, 23)}:00:00',
+                    }
+                    for s in range(sessions)
+                ],
+            }
+            for p in range(places)
+        ]
+    }